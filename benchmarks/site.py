@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import random
+
+from django.conf import settings
+
+from cms.api import add_plugin, create_page
+
+
+TEMPLATE = 'benchmark.html'
+
+# Slots of the benchmark template.
+SLOTS = ['slot-{0}'.format(index) for index in range(1, 11)]
+
+
+def get_plugin_types():
+    """
+    Return the (plugin type, field of the label, field of the URL) of the
+    link plugins to create, depending on the installed applications.
+    """
+    plugin_types = [('LinkPlugin', 'name', 'external_link')]
+    if 'aldryn_bootstrap3' in settings.INSTALLED_APPS:
+        plugin_types.append(('Bootstrap3ButtonCMSPlugin', 'label', 'link_url'))
+    return plugin_types
+
+
+def get_urls(count, duplication, broken, base_url, seed=0):
+    """
+    Return `count` URLs (in a random but reproducible order) to the stub
+    server, of which the `duplication` ratio are repeated and the `broken`
+    ratio of the distinct ones are not found or fail.
+    """
+    unique_count = max(1, int(round(count * (1 - duplication))))
+    broken_count = int(round(unique_count * broken))
+    urls = []
+    for index in range(unique_count):
+        if index < broken_count:
+            kind = 'missing' if index % 2 else 'error'
+        else:
+            kind = 'ok'
+        urls.append('{0}/{1}/{2}/'.format(base_url, kind, index))
+    random.Random(seed).shuffle(urls)
+    return [urls[index % unique_count] for index in range(count)]
+
+
+def create_site(pages, placeholders, plugins, duplication, broken, base_url, seed=0):
+    """
+    Create `pages` published pages, each with `plugins` link plugins spread
+    over `placeholders` of its placeholders. Return the number of plugins.
+    """
+    language = settings.LANGUAGE_CODE
+    plugin_types = get_plugin_types()
+    urls = get_urls(pages * plugins, duplication, broken, base_url, seed)
+    slots = SLOTS[:placeholders]
+
+    home = None
+    for page_index in range(pages):
+        page = create_page('Page {0}'.format(page_index), TEMPLATE, language, parent=home)
+        home = home or page
+        page.rescan_placeholders()
+        page_placeholders = dict((placeholder.slot, placeholder) for placeholder in page.placeholders.all())
+        for plugin_index in range(plugins):
+            plugin_type, label_field, url_field = plugin_types[plugin_index % len(plugin_types)]
+            add_plugin(
+                page_placeholders[slots[plugin_index % len(slots)]], plugin_type, language,
+                **{label_field: 'Link {0}'.format(plugin_index), url_field: urls[page_index * plugins + plugin_index]}
+            )
+        page.publish(language)
+    return pages * plugins
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import threading
+import time
+
+try:  # pragma: no cover
+    # Python 3.x
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:  # pragma: no cover
+    # Python 2.x
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+# Status of the responses, by the first segment of the requested path.
+STATUSES = {
+    'ok': 200,
+    'missing': 404,
+    'error': 500,
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers /ok/..., /missing/... and /error/... with a 200, 404 or 500
+    status, after the latency of the server. Connections are kept alive, as
+    by most servers.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.respond()
+
+    def do_GET(self):
+        self.respond()
+
+    def respond(self):
+        time.sleep(self.server.latency)
+        status = STATUSES.get(self.path.strip('/').split('/')[0], 404)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    """
+    A local HTTP server standing for the hosts links point to, run in a
+    background thread.
+    """
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, port=0):
+        HTTPServer.__init__(self, ('127.0.0.1', port), StubHandler)
+        self.latency = latency
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}'.format(self.server_address[1])
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
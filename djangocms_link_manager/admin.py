@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib import admin
+
+from .models import LinkCheckResult, LinkReference
+
+
+@admin.register(LinkCheckResult)
+class LinkCheckResultAdmin(admin.ModelAdmin):
+    """
+    Read-only list of the stored results, e.g. to find the broken links of
+    a page without running check_links.
+    """
+    list_display = ('url', 'valid', 'reason', 'status_code', 'page', 'slot', 'plugin_type', 'checked_at')
+    list_filter = ('valid', 'reason', 'verify_exists', 'plugin_type')
+    search_fields = ('url', 'page', 'label')
+    date_hierarchy = 'checked_at'
+    readonly_fields = [field.name for field in LinkCheckResult._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(LinkReference)
+class LinkReferenceAdmin(admin.ModelAdmin):
+    """
+    Read-only list of the links of the site, searchable by host and URL.
+    """
+    list_display = ('url', 'host', 'page_id', 'language', 'slot', 'plugin_type', 'plugin_id')
+    list_filter = ('plugin_type', 'language')
+    search_fields = ('=host', 'url')
+    readonly_fields = [field.name for field in LinkReference._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -7,6 +7,7 @@ from django.apps import AppConfig
 from .link_managers.bootstrap3_button_cmsplugin import Bootstrap3ButtonCMSPluginLinkManager
 from .link_managers.cmsplugin_link import CMSPluginLinkLinkManager
 
+from .conf import get_setting
 from .link_manager_pool import link_manager_pool
 
 
@@ -17,3 +18,7 @@ class LinkManagerConfig(AppConfig):
     def ready(self):
         link_manager_pool.register('Bootstrap3ButtonCMSPlugin', Bootstrap3ButtonCMSPluginLinkManager)
         link_manager_pool.register('LinkPlugin', CMSPluginLinkLinkManager)
+
+        if get_setting('CHECK_ON_PUBLISH'):
+            from .checks import connect_signals
+            connect_signals()
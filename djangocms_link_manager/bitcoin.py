@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Checks of Bitcoin addresses: legacy (base58check) addresses, and segwit
+addresses in bech32 (BIP 173) or bech32m (BIP 350).
+"""
+
+from __future__ import unicode_literals
+
+import binascii
+
+from hashlib import sha256
+
+from django.utils.lru_cache import lru_cache
+
+
+BASE58_DIGITS = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+BASE58_VALUES = dict((digit, value) for value, digit in enumerate(BASE58_DIGITS))
+
+BECH32_DIGITS = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+BECH32_VALUES = dict((digit, value) for value, digit in enumerate(BECH32_DIGITS))
+BECH32_GENERATOR = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+
+# Checksum constants of bech32 (witness version 0) and bech32m (later
+# versions).
+BECH32_CONST = 1
+BECH32M_CONST = 0x2bc830a3
+
+# Human readable parts of the mainnet and testnet segwit addresses.
+SEGWIT_PREFIXES = ('bc', 'tb')
+
+# Number of addresses whose check is remembered.
+ADDRESS_CACHE_SIZE = 1000
+
+
+def int_to_bytes(number, length):
+    """
+    Return `number` as `length` big-endian bytes. Raises OverflowError when
+    it doesn't fit.
+    """
+    try:
+        return number.to_bytes(length, 'big')
+    except AttributeError:  # pragma: no cover
+        # Python 2.x
+        digits = '%x' % number
+        if len(digits) > length * 2:
+            raise OverflowError('int too big to convert')
+        return binascii.unhexlify(digits.rjust(length * 2, '0'))
+
+
+def decode_base58(address, length):
+    """
+    Return the `length` bytes encoded by a base58 string. Raises KeyError on
+    a character which is not a base58 digit.
+    """
+    number = 0
+    for char in address:
+        number = number * 58 + BASE58_VALUES[char]
+    return int_to_bytes(number, length)
+
+
+def check_base58_address(address):
+    """
+    Return True if `address` is a base58check address with a valid checksum.
+    """
+    try:
+        address_bytes = decode_base58(address, 25)
+    except (KeyError, OverflowError):
+        return False
+    return address_bytes[-4:] == sha256(sha256(address_bytes[:-4]).digest()).digest()[:4]
+
+
+def bech32_polymod(values):
+    checksum = 1
+    for value in values:
+        top = checksum >> 25
+        checksum = (checksum & 0x1ffffff) << 5 ^ value
+        for index, generator in enumerate(BECH32_GENERATOR):
+            if (top >> index) & 1:
+                checksum ^= generator
+    return checksum
+
+
+def bech32_decode(address):
+    """
+    Return the (human readable part, data, checksum constant) of a bech32 or
+    bech32m string, or None if it is not one.
+    """
+    if address.lower() != address and address.upper() != address:
+        return None
+    address = address.lower()
+    separator = address.rfind('1')
+    if separator < 1 or separator + 7 > len(address) or len(address) > 90:
+        return None
+    hrp = address[:separator]
+    if any(ord(char) < 33 or ord(char) > 126 for char in hrp):
+        return None
+    try:
+        data = [BECH32_VALUES[char] for char in address[separator + 1:]]
+    except KeyError:
+        return None
+    expanded_hrp = [ord(char) >> 5 for char in hrp] + [0] + [ord(char) & 31 for char in hrp]
+    const = bech32_polymod(expanded_hrp + data)
+    if const not in (BECH32_CONST, BECH32M_CONST):
+        return None
+    return hrp, data[:-6], const
+
+
+def convert_bits(data, from_bits, to_bits):
+    """
+    Regroup the `from_bits` values of `data` into `to_bits` values, without
+    padding. Return None if there are leftover bits.
+    """
+    accumulator = 0
+    bits = 0
+    result = []
+    max_value = (1 << to_bits) - 1
+    for value in data:
+        accumulator = (accumulator << from_bits) | value
+        bits += from_bits
+        while bits >= to_bits:
+            bits -= to_bits
+            result.append((accumulator >> bits) & max_value)
+    if bits >= from_bits or (accumulator << (to_bits - bits)) & max_value:
+        return None
+    return result
+
+
+def check_segwit_address(address):
+    """
+    Return True if `address` is a valid bech32 (version 0) or bech32m
+    (versions 1 to 16) segwit address.
+    """
+    decoded = bech32_decode(address)
+    if decoded is None:
+        return False
+    hrp, data, const = decoded
+    if hrp not in SEGWIT_PREFIXES or not data:
+        return False
+    version = data[0]
+    program = convert_bits(data[1:], 5, 8)
+    if program is None or not 2 <= len(program) <= 40 or version > 16:
+        return False
+    if version == 0:
+        return const == BECH32_CONST and len(program) in (20, 32)
+    return const == BECH32M_CONST
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def check_address(address):
+    """
+    Return True if `address` is a valid Bitcoin address.
+    """
+    if address[:3].lower() in ('bc1', 'tb1'):
+        return check_segwit_address(address)
+    return check_base58_address(address)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Checks of the links of individual plugins, as they are saved or their page
+is published, so that the stored results (LinkCheckResult) and references
+(LinkReference) are up to date between two runs of check_links.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.timezone import now
+
+from cms.models import CMSPlugin, Page
+from cms.plugin_pool import plugin_pool
+from cms.signals import post_publish
+
+from .link_manager import as_link_reports
+from .link_manager_pool import link_manager_pool
+from .models import LinkCheckResult, LinkReference
+from .page_urls import PageURLs
+from .reports import BrokenLink
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_plugin_instances(link_plugins):
+    """
+    Return the concrete instances of the given (pk, plugin_type) pairs, in
+    the same order, loading them with one query per plugin type, along with
+    the `related_fields` of their link manager. Plugins whose type is no
+    longer installed are returned as None.
+    """
+    pks_by_type = OrderedDict()
+    for pk, plugin_type in link_plugins:
+        pks_by_type.setdefault(plugin_type, []).append(pk)
+
+    instances = {}
+    for plugin_type, pks in pks_by_type.items():
+        try:
+            model = plugin_pool.get_plugin(plugin_type).model
+        except KeyError:
+            continue
+        link_manager = link_manager_pool.get_link_manager(plugin_type)
+        related_fields = getattr(link_manager, 'related_fields', ())
+        for instance in model.objects.filter(pk__in=pks).select_related('placeholder', *related_fields):
+            instances[instance.pk] = instance
+    return [instances.get(pk) for pk, plugin_type in link_plugins]
+
+
+def get_result(plugin, link_report, checked_at, page_urls):
+    """
+    Return the LinkCheckResult of a link of `plugin`, checked offline.
+    """
+    broken_link = None
+    if not link_report.valid:
+        page = plugin.placeholder.page
+        page_url = page_urls.get_full_url(page, plugin.language) if page is not None else ''
+        broken_link = BrokenLink.from_link(plugin, link_report, page, page_url)
+    return LinkCheckResult.from_link(plugin, link_report, broken_link, verify_exists=False, checked_at=checked_at)
+
+
+def check_plugins(plugins):
+    """
+    Check the links of the given link plugin instances offline (without
+    verifying that they exist), and replace their stored results. Plugins
+    whose link manager fails are logged and left without results.
+    """
+    checked_at = now()
+    page_urls = PageURLs()
+    results = []
+    references = []
+    for plugin in plugins:
+        link_manager = link_manager_pool.get_link_manager(plugin.plugin_type)
+        if link_manager is None:
+            continue
+        try:
+            link_reports = as_link_reports(link_manager.check_link(plugin, verify_exists=False))
+            plugin_results = [get_result(plugin, link_report, checked_at, page_urls) for link_report in link_reports]
+            plugin_references = [
+                LinkReference.from_link(plugin, link_report.url, plugin.placeholder.page)
+                for link_report in link_reports if link_report.url
+            ]
+        except Exception:
+            logger.exception('Could not check the links of plugin %s', plugin.pk)
+            continue
+        results.extend(plugin_results)
+        references.extend(plugin_references)
+    plugin_ids = [plugin.pk for plugin in plugins]
+    LinkCheckResult.objects.replace(plugin_ids, results)
+    LinkReference.objects.replace(plugin_ids, references)
+    return results
+
+
+def check_published_page(page, language):
+    """
+    Check the link plugins of the public version of `page` in `language`.
+    """
+    public_page = page.get_public_object()
+    if public_page is None:
+        return []
+    link_plugins = CMSPlugin.objects.filter(
+        placeholder__page=public_page,
+        language=language,
+        plugin_type__in=link_manager_pool.get_link_plugin_types(),
+    ).order_by('pk').values_list('pk', 'plugin_type')
+    return check_plugins([plugin for plugin in get_plugin_instances(list(link_plugins)) if plugin is not None])
+
+
+def check_saved_plugin(instance):
+    """
+    Check a link plugin saved in a placeholder outside of pages. Plugins of
+    pages are checked when their page is published.
+    """
+    if instance.placeholder.page is not None:
+        return
+    if type(instance) is CMSPlugin:
+        try:
+            instance = instance.get_plugin_instance()[0]
+        except KeyError:
+            # The plugin type is not installed
+            return
+        if instance is None:
+            return
+    check_plugins([instance])
+
+
+def run_check(function, *args):
+    """
+    Run a check from a signal receiver, in a savepoint, logging its errors
+    so that saving or publishing never fails because of it.
+    """
+    try:
+        with transaction.atomic():
+            function(*args)
+    except Exception:
+        logger.exception('Could not check the links of %r', args[0])
+
+
+def plugin_saved(sender, instance, raw=False, **kwargs):
+    if raw or not isinstance(instance, CMSPlugin) or not instance.placeholder_id:
+        return
+    if instance.plugin_type in link_manager_pool.get_link_plugin_types():
+        run_check(check_saved_plugin, instance)
+
+
+def plugin_deleted(sender, instance, **kwargs):
+    if isinstance(instance, CMSPlugin):
+        LinkCheckResult.objects.filter(plugin_id=instance.pk).delete()
+        LinkReference.objects.filter(plugin_id=instance.pk).delete()
+
+
+def page_published(sender, instance, language, **kwargs):
+    run_check(check_published_page, instance, language)
+
+
+def connect_plugin_type(plugin_type):
+    """
+    Check the plugins of a link plugin type when they are saved.
+    """
+    try:
+        model = plugin_pool.get_plugin(plugin_type).model
+    except KeyError:
+        # The plugin type is not installed
+        return
+    post_save.connect(plugin_saved, sender=model, dispatch_uid='djangocms_link_manager.plugin_saved.{0}.{1}'.format(
+        model._meta.app_label, model._meta.model_name))
+
+
+def connect_signals():
+    # Plugins saved through CMSPlugin, and the plugins of each link plugin type.
+    post_save.connect(plugin_saved, sender=CMSPlugin, dispatch_uid='djangocms_link_manager.plugin_saved')
+    link_manager_pool.on_register(connect_plugin_type)
+    # Deleting a plugin also deletes its CMSPlugin row.
+    post_delete.connect(plugin_deleted, sender=CMSPlugin, dispatch_uid='djangocms_link_manager.plugin_deleted')
+    post_publish.connect(page_published, sender=Page, dispatch_uid='djangocms_link_manager.page_published')
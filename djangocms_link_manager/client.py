@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import threading
+
+import attr
+import requests
+
+try:  # pragma: no cover
+    from urllib3.util.retry import Retry
+except ImportError:  # pragma: no cover
+    from requests.packages.urllib3.util.retry import Retry
+
+from .conf import get_setting
+from .scheduler import clock
+
+
+# Statuses worth retrying (with backoff) when retries are enabled.
+RETRY_STATUSES = (500, 502, 504)
+
+
+@attr.s(slots=True)
+class HttpClient(object):
+    """
+    Makes the requests of the existence checks through a single pooled
+    session, so that connections to a host are kept alive and reused.
+    Requests are recorded in `metrics`, when given.
+    """
+    connect_timeout = attr.ib(default=attr.Factory(lambda: get_setting('CONNECT_TIMEOUT')))
+    read_timeout = attr.ib(default=attr.Factory(lambda: get_setting('READ_TIMEOUT')))
+    max_redirects = attr.ib(default=attr.Factory(lambda: get_setting('MAX_REDIRECTS')))
+    retries = attr.ib(default=attr.Factory(lambda: get_setting('RETRIES')))
+    retry_backoff = attr.ib(default=attr.Factory(lambda: get_setting('RETRY_BACKOFF')))
+    pool_size = attr.ib(default=attr.Factory(lambda: get_setting('HOST_CONCURRENCY')))
+    metrics = attr.ib(default=None)
+    _session = attr.ib(default=None, init=False)
+    _lock = attr.ib(default=attr.Factory(threading.Lock), init=False)
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = self.build_session()
+            return self._session
+
+    def build_session(self):
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.retry_backoff,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False,
+        )
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=get_setting('POOL_HOSTS'),
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.max_redirects = self.max_redirects
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        if self.metrics is None:
+            return self.session.request(method, url, **kwargs)
+        started_at = clock()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self.metrics.record_request(url, clock() - started_at)
+            raise
+        self.metrics.record_request(url, clock() - started_at, response.status_code)
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_default_client = None
+
+
+def get_default_client():
+    """
+    Return the client shared by the link managers used without a verifier.
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = HttpClient()
+    return _default_client
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Number of seconds a stored verdict stays valid, per outcome.
+    'VERDICT_TTL_SUCCESS': 7 * 24 * 60 * 60,
+    'VERDICT_TTL_FAILURE': 24 * 60 * 60,
+    # Minimum number of seconds between two requests to the same host. Their
+    # number is already bounded by HOST_CONCURRENCY, set it to be politer.
+    'HOST_INTERVAL': 0,
+    # Maximum number of requests made to the same host at the same time.
+    'HOST_CONCURRENCY': 2,
+    # Longest Retry-After (in seconds) a host may ask us to wait.
+    'MAX_RETRY_AFTER': 120,
+    # Seconds to wait for a connection, and then for the response.
+    'CONNECT_TIMEOUT': 5,
+    'READ_TIMEOUT': 15,
+    'MAX_REDIRECTS': 10,
+    # Number of retries of failed connections and 5xx responses, and the
+    # backoff factor between them.
+    'RETRIES': 1,
+    'RETRY_BACKOFF': 0.5,
+    # Number of hosts whose connections are kept alive.
+    'POOL_HOSTS': 100,
+    # Maximum number of days between two full runs when running
+    # incrementally.
+    'FULL_SWEEP_DAYS': 7,
+    # Number of seconds after which a running analysis job whose worker gave
+    # no sign of life is considered interrupted.
+    'JOB_STALE_AFTER': 5 * 60,
+    # Number of plugins loaded and checked at once by check_links, whose
+    # URLs are verified together.
+    'CHUNK_SIZE': 500,
+    # Check the links of plugins offline when their page is published (or,
+    # outside of pages, when they are saved).
+    'CHECK_ON_PUBLISH': False,
+}
+
+
+def get_setting(name):
+    """
+    Return the project's value of LINK_MANAGER_<name>, or its default.
+    """
+    return getattr(settings, 'LINK_MANAGER_{0}'.format(name), DEFAULTS[name])
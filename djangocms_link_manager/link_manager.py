@@ -2,15 +2,11 @@
 
 from __future__ import unicode_literals
 
-import codecs
 import phonenumbers
-import requests
-import socket
-import time
+import re
 import warnings
 
 from collections import OrderedDict
-from hashlib import sha256
 
 try:  # pragma: no cover
     # Python 3.x
@@ -23,9 +19,114 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import EmailValidator
 from django.core.validators import URLValidator
+from django.utils import six
+from django.utils.lru_cache import lru_cache
 
 import attr
 
+from . import bitcoin
+from .utils import normalize_url
+from .verdicts import EMPTY, MALFORMED, UNSUPPORTED_SCHEME, Verdict, as_verdict
+from .verifier import get_status_code
+
+
+# Validators are stateless, so a single instance of each is shared.
+url_validator = URLValidator()
+email_validator = EmailValidator()
+
+# Schemes validated by `LinkManager.validate_default()`.
+DEFAULT_SCHEMES = ('http', 'https', 'ftp', 'ftps')
+
+# Methods named `validate_*` which are not scheme validators.
+NOT_SCHEME_VALIDATORS = ('validate_default', 'validate_url', 'validate_urls')
+
+
+# Number of distinct phone numbers whose validation is remembered.
+PHONE_NUMBER_CACHE_SIZE = 10000
+
+# Visual separators, which don't change what a phone number is.
+PHONE_NUMBER_SEPARATORS = re.compile(r'[\s().\-/]')
+
+
+def get_phone_region():
+    """
+    Return the region assumed for phone numbers without a country code.
+    """
+    return settings.LANGUAGE_CODE.upper()
+
+
+@lru_cache(maxsize=PHONE_NUMBER_CACHE_SIZE)
+def _check_phone_number(number, region, verify_exists):
+    try:
+        parsed_num = phonenumbers.parse(number, region)
+    except phonenumbers.NumberParseException:
+        return False
+    if verify_exists:
+        return phonenumbers.is_valid_number(parsed_num)
+    return phonenumbers.is_possible_number(parsed_num)
+
+
+def check_phone_number(number, region, verify_exists=False):
+    """
+    Return True if `number` is parsable and a 'possible number', or with
+    `verify_exists` a valid number of an assigned exchange. Results are
+    remembered by number (without separators) and region.
+    """
+    return _check_phone_number(PHONE_NUMBER_SEPARATORS.sub('', number), region, verify_exists)
+
+
+def load_phone_metadata(region=None):
+    """
+    Load the phonenumbers metadata of `region` (by default the one of
+    numbers without a country code) before validating phone numbers,
+    rather than on the first one.
+    """
+    region = region or get_phone_region()
+    if phonenumbers.PhoneMetadata.metadata_for_region(region) is not None:
+        phonenumbers.example_number(region)
+
+
+# Names of the parts of a URL, as returned by `urlparse()`.
+URL_PARTS = ('scheme', 'netloc', 'path', 'params', 'query', 'fragment')
+
+
+class URLParts(OrderedDict):
+    """
+    The parts of a URL, as returned by `urlparse()`, by name: parts['path'].
+    The parts can also be read by attribute: parts.path.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @classmethod
+    def _make(cls, values):
+        return cls(zip(URL_PARTS, values))
+
+    def _replace(self, **changes):
+        """
+        Return a copy of the parts with the given parts changed.
+        """
+        parts = self.copy()
+        parts.update(changes)
+        return parts
+
+    def geturl(self):
+        return urlunparse(list(self.values()))
+
+
+def get_path(parts):
+    """
+    Return the path of `parts`, or `parts` itself when given as a string, as
+    validators used to be called with.
+    """
+    if isinstance(parts, six.string_types):
+        return parts
+    return parts['path']
+
 
 @attr.s(slots=True)
 class LinkReport(object):
@@ -33,14 +134,57 @@ class LinkReport(object):
     text = attr.ib()
     url = attr.ib()
 
+    @property
+    def reason(self):
+        return getattr(self.valid, 'reason', None)
+
+    @property
+    def status_code(self):
+        return getattr(self.valid, 'status_code', None)
+
+
+def as_link_reports(value):
+    """
+    Return the result of `LinkManager.check_link()`, a LinkReport or an
+    iterable of them, as a list of LinkReports.
+    """
+    try:
+        return list(value)
+    except TypeError:
+        # A single LinkReport
+        return [value]
+
 
 @attr.s(slots=True)
 class LinkManager(object):
     """
     Defines an interface for the link manager.
+
+    Its capabilities tell check_links how to run it:
+
+    - offline_only: links are only validated, never fetched (verify_exists
+      is ignored);
+    - needs_network: check_link() makes requests by itself, besides the
+      ones of the verifier, so plugins are checked in parallel (up to
+      --concurrency) when it doesn't support batches;
+    - supports_batch: check_links() checks several plugins at once;
+    - supports_async: URLs are only fetched through the verifier (see
+      validate_url()), so they can be collected and verified together with
+      the ones of the other link managers.
+
+    `related_fields` are the foreign keys of the plugin model which
+    check_link() follows, loaded along with the plugin instances.
     """
+    offline_only = False
+    needs_network = False
+    supports_batch = True
+    supports_async = True
+    related_fields = ()
+
     scheme = attr.ib(default='http')
     netloc = attr.ib(default='localhost:8000')
+    verifier = attr.ib(default=None)
+    page_urls = attr.ib(default=None)
 
     def validate_default(self, parts, verify_exists=False):
         """
@@ -53,57 +197,34 @@ class LinkManager(object):
         :param verify_exists:
         :return:
         """
-        validator = URLValidator()
-        if not parts['netloc']:
+        if not parts.netloc:
             # If there is no host/port, then this may be a link to a local
             # resource (media or static asset, etc.) Use the provided default.
-            parts['netloc'] = self.netloc
-        url = urlunparse(parts.values())
+            parts = parts._replace(netloc=self.netloc)
+        url = parts.geturl()
         try:
-            validator(url)
+            url_validator(url)
         except ValidationError:
-            return False
+            return Verdict(False, reason=MALFORMED)
         else:
             if verify_exists:
-                try:
-                    response = requests.head(url)
-                    if 400 <= response.status_code <= 500:  # Some sites do not handle HEAD requests correctly
-                        raise requests.HTTPError
-                    return 200 <= response.status_code < 400  # pragma: no cover
-                except requests.HTTPError:
-                    try:
-                        time.sleep(0.5) # Some sites prevent request being made too quickly
-                        response = requests.get(url, headers={
-                            # Some site check for a common User Agent
-                            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:83.0) Gecko/20100101 Firefox/83.0"
-                        })
-                        return 200 <= response.status_code < 400  # pragma: no cover
-                    except (requests.HTTPError,
-                            requests.ConnectionError,
-                            requests.TooManyRedirects,
-                            UnicodeEncodeError,
-                            socket.error):
-                        return False
-                except (requests.ConnectionError,
-                        requests.TooManyRedirects,
-                        UnicodeEncodeError,
-                        socket.error):
-                    return False
+                if self.verifier is not None:
+                    return self.verifier.verify(url)
+                return Verdict.from_status_code(get_status_code(url))
             else:
                 return True
 
-    def validate_mailto(self, email, verify_exists=False):
+    def validate_mailto(self, parts, verify_exists=False):
         """
         Validates a mailto URL, by using Django's EmailValidator.
         `verify_exists` does nothing at this time.
 
-        :param parts:
+        :param parts: URLParts, or the email address
         :param verify_exists:
         :return:
         """
-        validator = EmailValidator()
         try:
-            validator(email)
+            email_validator(get_path(parts))
         except ValidationError:
             return False
         else:
@@ -111,60 +232,33 @@ class LinkManager(object):
 
     def validate_bitcoin(self, parts, verify_exists=False):
         """
-        Checks that the address portion of the URL has a valid checksum.
+        Checks that the address portion of the URL has a valid checksum, as
+        a legacy (base58check) or segwit (bech32 or bech32m) address.
         `verify_exists` does nothing at this time.
 
         :param parts:
         :param verify_exists:
         :return:
         """
-        # Code borrowed from:
-        # https://rosettacode.org/wiki/Bitcoin/address_validation#Python
-        digits58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
-
-        def to_bytes(n, length):
-            s = '%x' % n
-            s = s.rjust(length * 2, '0')
-            s = codecs.decode(s.encode("UTF-8"), 'hex_codec')
-            return s
-
-        def decode_base58(bc, length):
-            n = 0
-            for char in bc:
-                n = n * 58 + digits58.index(char)
-            return to_bytes(n, length)
-
-        def check_bc(bc):
-            bcbytes = decode_base58(bc, 25)
-            return bcbytes[-4:] == sha256(sha256(bcbytes[:-4]).digest()).digest()[:4]
+        return bitcoin.check_address(parts.path)
 
-        btc_address = parts['path']
-        return check_bc(btc_address)
-
-    def validate_tel(self, phone_number, verify_exists=False):
+    def validate_tel(self, parts, verify_exists=False):
         """
         Checks if the number is parsable and is a 'possible number'.
         `verify_exists` doesn't attempt to make a call, but checks that the
         number is also in an assigned exchange.
 
-        :param parts:
+        :param parts: URLParts, or the phone number
         :param verify_exists:
         :return:
         """
-        try:
-            parsed_num = phonenumbers.parse(phone_number, settings.LANGUAGE_CODE.upper())
-        except phonenumbers.NumberParseException:
-            return False
-        else:
-            if verify_exists:
-                return phonenumbers.is_valid_number(parsed_num)
-            else:
-                return phonenumbers.is_possible_number(parsed_num)
+        return check_phone_number(get_path(parts), get_phone_region(), verify_exists=verify_exists)
 
     def validate_url(self, url, verify_exists=False):
         """
         Utility for checking any URL. This is the primary entry-point. This
         method acts as a router to the various scheme-specific validators.
+        Returns a Verdict, which is truthy when the URL is valid.
 
         :param url:
         :param verify_exists:
@@ -175,29 +269,88 @@ class LinkManager(object):
             # this test, it becomes a relative link to the root of the
             # project, which it kinda is, but isn't quite right. Also catches
             # `None`, etc.
-            return False
+            return Verdict(False, reason=EMPTY)
+
+        if self.verifier is None:
+            return self._validate_url(url, verify_exists=verify_exists)
+
+        # Validate each distinct URL only once per run, and per link manager
+        # class, as they may validate schemes differently.
+        return self.verifier.validate(
+            normalize_url(url, scheme=self.scheme, netloc=self.netloc),
+            verify_exists,
+            lambda: self._validate_url(url, verify_exists=verify_exists),
+            validator=type(self),
+        )
 
-        parts = OrderedDict(zip(
-            ['scheme', 'netloc', 'path', 'params', 'query', 'fragment'],
-            urlparse(url)
-        ))
+    def validate_urls(self, urls, verify_exists=False):
+        """
+        Batch version of `validate_url()`: return the verdicts of `urls`, in
+        order. Each distinct URL is validated once and, with a verifier, the
+        URLs to verify are fetched together (see `LinkVerifier.collect()`).
+
+        :param urls:
+        :param verify_exists:
+        :return: list of Verdicts
+        """
+        unique_urls = list(OrderedDict.fromkeys(urls))
+        if verify_exists and self.verifier is not None:
+            with self.verifier.collect():
+                for url in unique_urls:
+                    self.validate_url(url, verify_exists=verify_exists)
+            self.verifier.verify_pending()
+        verdicts = dict((url, self.validate_url(url, verify_exists=verify_exists)) for url in unique_urls)
+        return [verdicts[url] for url in urls]
 
-        if not parts['scheme']:
+    @classmethod
+    def get_scheme_validators(cls):
+        """
+        Return the dispatch table of the class, a dict of the validators of
+        its `validate_<scheme>` methods by scheme. It is built once per class.
+        """
+        validators = cls.__dict__.get('_scheme_validators')
+        if validators is None:
+            validators = dict(
+                (name[len('validate_'):], getattr(cls, name)) for name in dir(cls)
+                if name.startswith('validate_') and name not in NOT_SCHEME_VALIDATORS
+            )
+            for scheme in DEFAULT_SCHEMES:
+                validators[scheme] = cls.validate_default
+            setattr(cls, '_scheme_validators', validators)
+        return validators
+
+    def _validate_url(self, url, verify_exists=False):
+        parts = URLParts._make(urlparse(url))
+
+        if not parts.scheme:
             # Sometimes users enter urls without the scheme (intentionally or
             # otherwise). These are valid in browsers, but possibly not for our
             # validator, so we'll use the provided default.
-            parts['scheme'] = self.scheme
+            parts = parts._replace(scheme=self.scheme)
 
-        scheme = parts['scheme']
-        if scheme in ['http', 'https', 'ftp', 'ftps']:
-            return self.validate_default(parts, verify_exists=verify_exists)
+        try:
+            validator = self.get_scheme_validators()[parts.scheme]
+        except KeyError:
+            warnings.warn('Validator not found for scheme: "{0}".'.format(parts.scheme))
+            return Verdict(False, reason=UNSUPPORTED_SCHEME)
+        return as_verdict(validator(self, parts, verify_exists=verify_exists))
 
-        elif scheme != 'url' and hasattr(self, 'validate_' + scheme):
-            validator = getattr(self, 'validate_' + scheme)
-            return validator(parts, verify_exists=verify_exists)
-        else:
-            warnings.warn('Validator not found for scheme: "{0}".'.format(scheme))
-            return False
+    def get_page_url(self, instance, field_name):
+        """
+        Return the URL of the page the plugin instance links to with its
+        `field_name` foreign key, in the instance's language. The page is
+        only loaded when it is not in `page_urls`.
+        Raises NoReverseMatch when the page has no URL.
+
+        :param instance: Plugin instance
+        :param field_name: Name of the foreign key to Page
+        :return:
+        """
+        page_id = getattr(instance, field_name + '_id')
+        if self.page_urls is None:
+            return getattr(instance, field_name).get_absolute_url(instance.language)
+        return self.page_urls.get_absolute_url(
+            page_id, instance.language, lambda: getattr(instance, field_name))
 
     def check_link(self, instance, verify_exists=False):
         """
@@ -209,3 +362,21 @@ class LinkManager(object):
         :return: LinkReport
         """
         raise NotImplementedError('Must be implemented in sub-class.')
+
+    def check_links(self, instances, verify_exists=False):
+        """
+        Batch version of `check_link()`: return the list of LinkReports of
+        each plugin instance, in order. With a verifier, the links of all the
+        instances are collected first, then their URLs are fetched together.
+        Subclasses only need to implement `check_link()`.
+
+        :param instances: Plugin instances
+        :param verify_exists:
+        :return: list of lists of LinkReports
+        """
+        if verify_exists and self.verifier is not None:
+            with self.verifier.collect():
+                for instance in instances:
+                    self.check_link(instance, verify_exists=verify_exists)
+            self.verifier.verify_pending()
+        return [as_link_reports(self.check_link(instance, verify_exists=verify_exists)) for instance in instances]
@@ -2,15 +2,41 @@
 
 from __future__ import unicode_literals
 
+import attr
+
 
 class LinkManagerPool(object):
-    _managers = {}
+
+    def __init__(self):
+        self._managers = {}
+        self._listeners = []
 
     def clear_pool(self):
         self._managers = {}
 
     def register(self, plugin_class, link_manager):
+        """
+        Register the link manager of a plugin type: either a LinkManager
+        instance, configured as needed, or a LinkManager class, which is
+        instantiated with its defaults.
+        """
+        if isinstance(link_manager, type):
+            link_manager = link_manager()
         self._managers[plugin_class] = link_manager
+        for listener in self._listeners:
+            listener(plugin_class)
+
+    def on_register(self, listener):
+        """
+        Call `listener` with each plugin type registered from now on, and
+        with the ones already registered.
+        """
+        self._listeners.append(listener)
+        for plugin_class in list(self._managers):
+            listener(plugin_class)
+
+    def unregister(self, plugin_class):
+        self._managers.pop(plugin_class, None)
 
     def get_link_manager(self, cls):
         return self._managers.get(cls, None)
@@ -18,5 +44,20 @@ class LinkManagerPool(object):
     def get_link_plugin_types(self):
         return self._managers.keys()
 
+    def configure(self, **changes):
+        """
+        Return copies of the registered link managers with the given
+        attributes changed (e.g. the verifier of a run), by plugin type.
+        Plugin types registered with the same manager share its copy, so
+        that their plugins are checked as one batch.
+        """
+        copies = {}
+        managers = {}
+        for plugin_class, link_manager in self._managers.items():
+            if id(link_manager) not in copies:
+                copies[id(link_manager)] = attr.evolve(link_manager, **changes)
+            managers[plugin_class] = copies[id(link_manager)]
+        return managers
+
 
 link_manager_pool = LinkManagerPool()
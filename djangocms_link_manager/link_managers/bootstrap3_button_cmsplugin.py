@@ -8,6 +8,7 @@ from ..link_manager import LinkManager, LinkReport
 
 
 class Bootstrap3ButtonCMSPluginLinkManager(LinkManager):
+    related_fields = ('link_file',)
 
     def check_link(self, instance, verify_exists=False):
         valid = False
@@ -21,9 +22,9 @@ class Bootstrap3ButtonCMSPluginLinkManager(LinkManager):
         elif instance.link_url:
             url = instance.link_url
             valid = self.validate_url(url, verify_exists=verify_exists)
-        elif instance.link_page:
+        elif instance.link_page_id:
             try:
-                url = instance.link_page.get_absolute_url(instance.language)
+                url = self.get_page_url(instance, 'link_page')
             except NoReverseMatch:
                 url = None
                 valid = False
@@ -32,7 +33,7 @@ class Bootstrap3ButtonCMSPluginLinkManager(LinkManager):
 
         elif instance.link_file:
             url = instance.link_file.url
-            valid = self.validate_url(url, verify_exists=verify_exists),
+            valid = self.validate_url(url, verify_exists=verify_exists)
 
         else:
             url = None
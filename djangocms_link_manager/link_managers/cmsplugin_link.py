@@ -5,16 +5,21 @@ from django.utils.translation import ugettext as _
 from django.core.urlresolvers import NoReverseMatch
 
 from ..link_manager import LinkManager, LinkReport
+from ..verdicts import EMPTY, Verdict
 
 
 class CMSPluginLinkLinkManager(LinkManager):
+    related_fields = ('file_link',)
 
     def check_link(self, instance, verify_exists=False):
         valid = False
+        url = None
+        # Why a link without URL is invalid, shown in its label.
+        problem = None
 
-        if instance.internal_link is not None:
+        if instance.internal_link_id is not None:
             try:
-                url = instance.internal_link.get_absolute_url(instance.language)
+                url = self.get_page_url(instance, 'internal_link')
             except NoReverseMatch:
                 url = None
             else:
@@ -26,27 +31,30 @@ class CMSPluginLinkLinkManager(LinkManager):
 
         elif instance.mailto is not '':
             url = instance.mailto
-            valid = self.validate_mailto(url, verify_exists=verify_exists)
+            valid = self.validate_url('mailto:' + url, verify_exists=verify_exists)
 
         elif instance.phone is not '':
             url = instance.phone
-            valid = self.validate_tel(url, verify_exists=verify_exists)
+            valid = self.validate_url('tel:' + url, verify_exists=verify_exists)
 
         elif instance.file_link is not None:
             url = instance.file_link.url
             valid = self.validate_url(url, verify_exists=verify_exists)
 
-        elif instance.get_children() > 0:
-            url = _('Invalid link (no URL) but with children plugins')
+        elif instance.get_children().exists():
+            valid = Verdict(False, reason=EMPTY)
+            problem = _('Invalid link (no URL) but with children plugins')
 
         else:
-            url = _('Invalid link (no URL)')
-
+            valid = Verdict(False, reason=EMPTY)
+            problem = _('Invalid link (no URL)')
 
         if instance.name == "":
             name = _("Link without label")
         else:
             name = instance.name
+        if problem is not None:
+            name = '{0} ({1})'.format(name, problem)
 
         return LinkReport(
             valid=valid,
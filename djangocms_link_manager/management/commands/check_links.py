@@ -1,11 +1,29 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-from django.core.management.base import BaseCommand
-from django.db.models import Q
+import io
+import json
+import multiprocessing
+import operator
+import os
+import shutil
+import tempfile
+
+from collections import OrderedDict
+from datetime import timedelta
+from functools import reduce
+from itertools import chain
+from multiprocessing.pool import ThreadPool
+
+import django
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import F, Q
 from django.template import TemplateDoesNotExist
-from django.template.loader import get_template
-from django.utils.lru_cache import lru_cache
+from django.utils import six
+from django.utils.encoding import force_text
 from django.utils.timezone import now
 from django.utils.translation import ugettext as _
 from django.utils.translation import get_language
@@ -14,16 +32,73 @@ from django.core.urlresolvers import reverse
 
 from django.core.mail import mail_managers
 
-from cms.models import CMSPlugin, NoReverseMatch
+from cms.constants import TEMPLATE_INHERITANCE_MAGIC
+from cms.models import CMSPlugin, Placeholder, Title
 from cms.models.pagemodel import Page
-from cms.utils.placeholder import get_placeholder_conf
+from cms.utils import get_cms_setting
 from cms.utils.placeholder import get_placeholders
 
+from ...checks import get_plugin_instances
+from ...client import HttpClient
+from ...conf import get_setting
+from ...link_manager import as_link_reports, load_phone_metadata
 from ...link_manager_pool import link_manager_pool
+from ...metrics import Metrics
+from ...models import LinkCheckResult, LinkCheckRun, LinkReference
+from ...page_urls import PageURLs
+from ...reports import REPORT_FORMATS, BrokenLink, get_report_writer, merge_reports
+from ...resolvers import LocalResolver
+from ...scheduler import HostScheduler, clock
+from ...store import VerdictStore
+from ...utils import close_idle_connections
+from ...verifier import LinkVerifier
 
 
 LANGUAGE_CODE = get_language()
 
+
+def keyset_chunks(queryset, size):
+    """
+    Yield the rows of a values_list() queryset, whose first value is the
+    pk, by chunks of `size` in pk order. Each chunk is a query of its own,
+    starting after the last pk of the previous one, so that no cursor is
+    kept open between chunks and the position is known at any time.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk_queryset[:size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1][0]
+
+
+def run_shard(options):
+    """
+    Run check_links over one shard, writing its progress messages to the
+    file at `options['log']`.
+    """
+    options = dict(options)
+    path = options.pop('log')
+    # The output of commands is written as byte strings on Python 2.x.
+    log = io.open(path, 'wb') if six.PY2 else io.open(path, 'w', encoding='utf-8')
+    with log:
+        call_command('check_links', stdout=log, stderr=log, **options)
+
+
+def check_shard(options):
+    """
+    Run check_links over one shard, in a worker process.
+    """
+    django.setup()
+    try:
+        run_shard(options)
+    finally:
+        connections.close_all()
+
+
 class Command(BaseCommand):
     help = """Generate link report."""
 
@@ -34,16 +109,115 @@ class Command(BaseCommand):
             help="Check that each link's target exists (use caution, makes HTTP HEAD requests)."
         )
         parser.add_argument(
-            '--scheme', action='store', dest='scheme', default='http',
-            help='Default scheme to use for scheme-less URLs (default: "http").'
+            '--concurrency', action='store', dest='concurrency', type=int, default=1,
+            help='Number of URLs to verify in parallel when using --verify-exists (default: 1).'
+        )
+        parser.add_argument(
+            '--host-interval', action='store', dest='host_interval', type=float, default=None,
+            help='Minimum number of seconds between two requests to the same host '
+                 '(default: LINK_MANAGER_HOST_INTERVAL or 0).'
+        )
+        parser.add_argument(
+            '--host-concurrency', action='store', dest='host_concurrency', type=int, default=None,
+            help='Maximum number of parallel requests to the same host '
+                 '(default: LINK_MANAGER_HOST_CONCURRENCY or 2).'
+        )
+        parser.add_argument(
+            '--connect-timeout', action='store', dest='connect_timeout', type=float, default=None,
+            help='Seconds to wait for a connection to a host (default: LINK_MANAGER_CONNECT_TIMEOUT or 5).'
+        )
+        parser.add_argument(
+            '--read-timeout', action='store', dest='read_timeout', type=float, default=None,
+            help='Seconds to wait for a response once connected (default: LINK_MANAGER_READ_TIMEOUT or 15).'
+        )
+        parser.add_argument(
+            '--max-redirects', action='store', dest='max_redirects', type=int, default=None,
+            help='Maximum number of redirects to follow (default: LINK_MANAGER_MAX_REDIRECTS or 10).'
+        )
+        parser.add_argument(
+            '--retries', action='store', dest='retries', type=int, default=None,
+            help='Number of retries of failed connections and 5xx responses (default: LINK_MANAGER_RETRIES or 1).'
+        )
+        parser.add_argument(
+            '--retry-backoff', action='store', dest='retry_backoff', type=float, default=None,
+            help='Backoff factor between retries (default: LINK_MANAGER_RETRY_BACKOFF or 0.5).'
+        )
+        parser.add_argument(
+            '--resolve-locally', action='store_true', dest='resolve_locally', default=False,
+            help='With --verify-exists, check the links to --host, or to the hosts of the link managers '
+                 '(media and static files, pages and other views) locally instead of requesting them.'
+        )
+        parser.add_argument(
+            '--refresh-cache', action='store_true', dest='refresh_cache', default=False,
+            help='Ignore the verdicts stored by previous runs and verify every URL again.'
+        )
+        parser.add_argument(
+            '--no-cache', action='store_true', dest='no_cache', default=False,
+            help='Neither use nor update the verdicts stored by previous runs.'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true', dest='incremental', default=False,
+            help='Only check the plugins changed since the last run, and report the stored results of the others.'
+        )
+        parser.add_argument(
+            '--full-sweep-days', action='store', dest='full_sweep_days', type=int, default=None,
+            help='With --incremental, check every plugin when the last full run is older than this number of days '
+                 '(default: LINK_MANAGER_FULL_SWEEP_DAYS or 7).'
+        )
+        parser.add_argument(
+            '--chunk-size', action='store', dest='chunk_size', type=int, default=None,
+            help='Number of plugins loaded and checked at once, whose URLs are verified together '
+                 '(default: LINK_MANAGER_CHUNK_SIZE or 500).'
+        )
+        parser.add_argument(
+            '--no-count', action='store_true', dest='no_count', default=False,
+            help='Skip counting the plugins to check before checking them.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true', dest='resume', default=False,
+            help='Resume the last run if it was interrupted, reporting the stored results of the plugins '
+                 'it already checked.'
+        )
+        parser.add_argument(
+            '--shard', action='store', dest='shard', default=None,
+            help='Only check the K-th of N shards of the plugins, given as K/N (e.g. 1/4), '
+                 'writing a partial report to be combined with --merge (requires --format jsonl).'
+        )
+        parser.add_argument(
+            '--workers', action='store', dest='workers', type=int, default=1,
+            help='Number of processes checking a shard of the plugins each (default: 1).'
+        )
+        parser.add_argument(
+            '--merge', action='store', dest='merge', nargs='+', default=None, metavar='PARTIAL_REPORT',
+            help='Instead of checking links, combine the partial jsonl reports of sharded runs into one report.'
+        )
+        parser.add_argument(
+            '--scheme', action='store', dest='scheme', default=None,
+            help='Default scheme to use for scheme-less URLs (default: the one of each link manager, "http" '
+                 'unless configured otherwise).'
+        )
+        parser.add_argument(
+            '--host', action='store', dest='netloc', default=None,
+            help='Default [host:port] to use for relative URLs (default: the one of each link manager, '
+                 '"localhost:8000" unless configured otherwise).'
+        )
+        parser.add_argument(
+            '--template', action='store', dest='template', default=None,
+            help='Override the report rendering template (text and html formats).'
+        )
+        parser.add_argument(
+            '--format', action='store', dest='format', default='text', choices=sorted(REPORT_FORMATS),
+            help='Format of the report (default: "text"). The jsonl and csv formats write '
+                 'one record per broken link as soon as it is found.'
         )
         parser.add_argument(
-            '--host', action='store', dest='netloc', default='localhost:8000',
-            help='Default [host:port] to use for relative URLs (defaults to "localhost:8000").'
+            '--output', action='store', dest='output', default=None,
+            help='Write the report to the given file instead of the console.'
         )
         parser.add_argument(
-            '--template', action='store', dest='template', default='djangocms_link_manager/text_only.html',
-            help='Override the report rendering template.'
+            '--metrics-file', action='store', dest='metrics_file', default=None,
+            help='Write the measures of the run (durations, queries, HTTP requests, cache hits) '
+                 'to the given file, as JSON.'
         )
         parser.add_argument(
             '--mail-managers', action='store_true', dest='mail_managers', default=False,
@@ -63,9 +237,201 @@ class Command(BaseCommand):
             help="Check only the placeholder with a given id"
         )
 
-    @lru_cache(maxsize=100)
-    def get_link_manager(self, plugin_type, scheme, netloc):
-        return link_manager_pool.get_link_manager(plugin_type)(scheme=scheme, netloc=netloc)
+    def log(self, message):
+        self.log_stream.write(message)
+
+    def get_option(self, options, name, setting):
+        value = options.get(name)
+        if value is None:
+            value = get_setting(setting)
+        return value
+
+    def get_template_slots(self, template):
+        """
+        Return the set of placeholder slots declared by the template, or None
+        if the template could not be found. Each template is parsed once.
+        """
+        try:
+            return self._template_slots[template]
+        except KeyError:
+            pass
+        try:
+            slots = frozenset(placeholder.slot for placeholder in get_placeholders(template))
+        except TemplateDoesNotExist:
+            slots = None
+        self._template_slots[template] = slots
+        return slots
+
+    def get_ghost_placeholders(self):
+        """
+        Return a queryset of the placeholders of published pages whose slot
+        is not declared by the page's template (e.g. created by a template
+        the page no longer uses).
+
+        Each template is parsed once, and pages with an explicit template
+        are excluded with one condition per template. Pages inheriting their
+        template are resolved in memory, and only the placeholders of theirs
+        whose slot is not declared by every template are read to find their
+        ghosts, so that the exclusion doesn't list the (many) inheriting
+        pages.
+        """
+        pages = dict(
+            (pk, (template, parent_id)) for pk, template, parent_id
+            in Page.objects.filter(publisher_is_draft=False).values_list('pk', 'template', 'parent_id')
+        )
+        default_template = get_cms_setting('TEMPLATES')[0][0]
+
+        # The template of each page inheriting its template.
+        inherited_templates = {}
+        templates = set()
+        for pk, (template, parent_id) in pages.items():
+            if template != TEMPLATE_INHERITANCE_MAGIC:
+                templates.add(template)
+                continue
+            while template == TEMPLATE_INHERITANCE_MAGIC and parent_id in pages:
+                template, parent_id = pages[parent_id]
+            if template == TEMPLATE_INHERITANCE_MAGIC:
+                template = default_template
+            inherited_templates[pk] = template
+
+        all_slots = {}
+        for template in sorted(templates | set(inherited_templates.values())):
+            slots = self.get_template_slots(template)
+            if slots is None:
+                self.log('** Template "{}" could not be found, its pages are all checked **'.format(template))
+                continue
+            all_slots[template] = slots
+
+        conditions = [
+            Q(page__template=template) & ~Q(slot__in=all_slots[template])
+            for template in sorted(templates) if template in all_slots
+        ]
+
+        if inherited_templates and all_slots:
+            common_slots = reduce(operator.and_, all_slots.values())
+            candidates = Placeholder.objects.filter(
+                page__publisher_is_draft=False, page__template=TEMPLATE_INHERITANCE_MAGIC,
+            ).exclude(slot__in=common_slots).values_list('pk', 'page', 'slot')
+            ghost_pks = [
+                pk for pk, page_id, slot in candidates
+                if inherited_templates.get(page_id) in all_slots and slot not in all_slots[inherited_templates[page_id]]
+            ]
+            if ghost_pks:
+                conditions.append(Q(pk__in=ghost_pks))
+
+        if not conditions:
+            return Placeholder.objects.none()
+        return Placeholder.objects.filter(page__publisher_is_draft=False).filter(reduce(operator.or_, conditions))
+
+    def get_plugin_instances(self, link_plugins):
+        return get_plugin_instances(link_plugins)
+
+    def get_pages(self, placeholder_ids):
+        """
+        Return a dict of the pages (with their site and titles) of the given
+        placeholders, by placeholder id, using two queries.
+        """
+        page_placeholders = Page.placeholders.through.objects.filter(
+            placeholder_id__in=placeholder_ids,
+        ).select_related('page__site')
+        pages = dict((item.placeholder_id, item.page) for item in page_placeholders)
+
+        titles = {}
+        for title in Title.objects.filter(page_id__in=set(page.pk for page in pages.values())):
+            titles.setdefault(title.page_id, {})[title.language] = title
+        for page in pages.values():
+            # Spare a query per page when its title or URL is needed.
+            page.title_cache = titles.get(page.pk, {})
+        return pages
+
+    def get_broken_link(self, plugin_inst, link_report, pages):
+        """
+        Return the BrokenLink of an invalid link report, or None if the plugin
+        is in an orphaned placeholder.
+        """
+        page = pages.get(plugin_inst.placeholder_id)
+        if page:
+            page_url = self.page_urls.get_full_url(page, plugin_inst.language)
+        else:
+            infos = self.handle_placeholder_outside_cms(plugin_inst)
+            if infos is None:
+                return None
+            page = infos['title']
+            page_url = infos['url']
+        return BrokenLink.from_link(plugin_inst, link_report, page, page_url)
+
+    def get_result(self, plugin_inst, link_report, broken_link, verify_exists):
+        """
+        Return the LinkCheckResult to store for a link report.
+        """
+        return LinkCheckResult.from_link(plugin_inst, link_report, broken_link, verify_exists, self.started_at)
+
+    def get_link_reports(self, plugins, verify_exists, concurrency):
+        """
+        Check the (plugin instance, link manager) pairs of `plugins`, running
+        each link manager according to its capabilities. Return the lists of
+        LinkReports by plugin pk.
+        """
+        batches = OrderedDict()
+        for plugin_inst, link_manager in plugins:
+            batches.setdefault(id(link_manager), (link_manager, []))[1].append(plugin_inst)
+
+        link_reports_by_pk = {}
+        # The URLs of the link managers fetching them through the verifier are
+        # collected first, then verified all together.
+        collected = [
+            (link_manager, instances) for link_manager, instances in batches.values()
+            if verify_exists and link_manager.supports_async and not link_manager.offline_only and
+            link_manager.verifier is self.verifier
+        ]
+        if collected:
+            with self.verifier.collect():
+                for link_manager, instances in collected:
+                    for plugin_inst in instances:
+                        link_manager.check_link(plugin_inst, verify_exists=True)
+            self.verifier.verify_pending()
+            for link_manager, instances in collected:
+                for plugin_inst in instances:
+                    link_reports_by_pk[plugin_inst.pk] = as_link_reports(
+                        link_manager.check_link(plugin_inst, verify_exists=True))
+
+        collected_managers = set(id(link_manager) for link_manager, instances in collected)
+        for link_manager, instances in batches.values():
+            if id(link_manager) in collected_managers:
+                continue
+            manager_verify_exists = verify_exists and not link_manager.offline_only
+
+            def check_link(plugin_inst):
+                return as_link_reports(link_manager.check_link(plugin_inst, verify_exists=manager_verify_exists))
+
+            if link_manager.supports_batch:
+                all_link_reports = link_manager.check_links(instances, verify_exists=manager_verify_exists)
+            elif link_manager.needs_network and concurrency > 1 and len(instances) > 1:
+                pool = ThreadPool(min(concurrency, len(instances)))
+                try:
+                    all_link_reports = pool.map(check_link, instances)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                all_link_reports = [check_link(plugin_inst) for plugin_inst in instances]
+            for plugin_inst, link_reports in zip(instances, all_link_reports):
+                link_reports_by_pk[plugin_inst.pk] = link_reports
+        return link_reports_by_pk
+
+    def get_changed_plugins(self, link_plugins, watermark, verify_exists):
+        """
+        Return the plugins of `link_plugins` which changed (or whose page was
+        changed or published) since `watermark`, or which have no stored
+        results usable by this run.
+        """
+        usable_results = LinkCheckResult.objects.usable(verify_exists)
+        return link_plugins.filter(
+            Q(changed_date__gt=watermark) |
+            Q(placeholder__page__changed_date__gt=watermark) |
+            Q(placeholder__page__publication_date__gt=watermark) |
+            ~Q(pk__in=usable_results.values('plugin_id'))
+        )
 
     def handle_placeholder_outside_cms(self, link_plugin):
         article_set = getattr(link_plugin.placeholder, 'article_set', None)
@@ -80,61 +446,45 @@ class Command(BaseCommand):
         # it's probably an orphaned placeholder
         return None
 
-    def handle(self, *args, **options):
-        self.stdout.write("Start link check...")
-       
+    def is_site_wide(self, options):
         """
-        We're only interested in link plugins that are either not on any page or
-        are on a published page.
-
-        NOTE: This could be a large set.
+        Return True if the run checks the whole site (or a shard of it).
         """
-        verify_exists = options['verify_exists']
-        scheme = options['scheme']
-        netloc = options['netloc']
+        return all(options[name] is None for name in ('only_page_reverse_id', 'only_page_id', 'only_placeholder_id'))
 
-        bad_links = []
-        unknown_plugin_classes = []
-        count_all_links = 0
+    def get_shard(self, options):
+        """
+        Return the (index, count) of the --shard option, or None.
+        """
+        if options.get('shard') is None:
+            return None
+        try:
+            index, count = [int(value) for value in options['shard'].split('/')]
+        except ValueError:
+            raise CommandError('--shard must be given as K/N, e.g. 1/4')
+        if not 1 <= index <= count:
+            raise CommandError('--shard K/N requires 1 <= K <= N')
+        return index, count
 
+    def get_link_plugins(self, options, shard=None):
+        """
+        Return the queryset of the link plugins to check, restricted to the
+        given (index, count) shard. Shards partition the plugins by pk
+        modulo their count, which doesn't depend on when they are computed.
+        """
         if options['only_page_reverse_id'] is not None:
             pages = Page.objects.filter(
                 reverse_id=options["only_page_reverse_id"], publisher_is_draft=False
             )
-            self.stdout.write("Check only page: {}".format(pages.first().get_title(LANGUAGE_CODE)))
+            self.log("Check only page: {}".format(pages.first().get_title(LANGUAGE_CODE)))
         elif options['only_page_id'] is not None:
             pages = Page.objects.filter(
                 id=options["only_page_id"]
             )
-            self.stdout.write("Check only page: {}".format(pages.first().get_title(LANGUAGE_CODE)))
-        else:
-            pages = Page.objects.all()
-
-        excluded_placeholders = []
-        if options['only_placeholder_id'] is None:
-            self.stdout.write("Search for placeholders to exclude...")
-            # Find ghosts placeholders ie placeholders created
-            # by a template that is no longer used by a page
-
-            for page in pages:
-                try:
-                    template_placeholders = map(lambda x:x.slot, get_placeholders(page.get_template()))
-                except TemplateDoesNotExist:
-                    self.stdout.write(
-                        '** "{}" has template "{}" which could not be found **'.format(
-                            page.get_title(),
-                            page.template,
-                        )
-                    )
-                    continue
-
-                for placeholder in page.placeholders.all():
-                    if not placeholder.slot in template_placeholders:
-                        excluded_placeholders.append(placeholder)
-            self.stdout.write("Done")
+            self.log("Check only page: {}".format(pages.first().get_title(LANGUAGE_CODE)))
 
         link_plugins = CMSPlugin.objects.filter(plugin_type__in=link_manager_pool.get_link_plugin_types())
-        
+
         if options['only_page_reverse_id'] is not None:
             link_plugins = link_plugins.filter(placeholder__page__reverse_id=options['only_page_reverse_id'])
         elif options['only_page_id'] is not None:
@@ -142,6 +492,13 @@ class Command(BaseCommand):
         elif options['only_placeholder_id'] is not None:
             link_plugins = link_plugins.filter(placeholder__id=options['only_placeholder_id'])
         else:
+            self.log("Search for placeholders to exclude...")
+            # Find ghosts placeholders ie placeholders created
+            # by a template that is no longer used by a page
+            with self.metrics.phase('placeholder_exclusion'):
+                excluded_placeholders = self.get_ghost_placeholders()
+            self.log("Done")
+
             # Check only plugins contained in placeholders which
             # - are on a published page
             # - or are on no page at all (PlaceholderFields).
@@ -149,91 +506,399 @@ class Command(BaseCommand):
             link_plugins = link_plugins.filter(
                 Q(placeholder__page__isnull=True) |
                 Q(placeholder__page__publisher_is_draft=False)
-            ).exclude(placeholder__in=excluded_placeholders)
+            ).exclude(placeholder__in=excluded_placeholders.values('pk'))
 
+        if shard is not None:
+            index, count = shard
+            link_plugins = link_plugins.annotate(shard=F('pk') % count).filter(shard=index - 1)
+        return link_plugins
 
-        self.stdout.write('Will check {} Plugins'.format(link_plugins.count()))
+    def get_watermark(self, options, run):
+        """
+        Return the date since when changed plugins are checked by an
+        incremental run, or None when every plugin must be checked.
+        """
+        verify_exists = options['verify_exists']
+        watermark = LinkCheckRun.objects.get_watermark(verify_exists)
+        last_full_sweep = LinkCheckRun.objects.get_last_full_sweep(verify_exists)
+        full_sweep_days = self.get_option(options, 'full_sweep_days', 'FULL_SWEEP_DAYS')
+        if watermark is None or last_full_sweep is None or (
+                last_full_sweep < self.started_at - timedelta(days=full_sweep_days)):
+            self.log('Last full run is too old or missing, checking every plugin')
+            if run is not None:
+                run.incremental = False
+                run.save()
+            return None
+        return watermark
+
+    def get_link_managers(self, options):
+        """
+        Return the link managers of the run by plugin type. They keep the
+        scheme and host they were registered with, unless --scheme or --host
+        is given.
+        """
+        changes = dict(
+            (name, options[name]) for name in ('scheme', 'netloc') if options.get(name) is not None)
+        return link_manager_pool.configure(verifier=self.verifier, page_urls=self.page_urls, **changes)
+
+    def get_local_netlocs(self, options):
+        """
+        Return the hosts of this site: the one given with --host, or else the
+        ones the link managers make relative URLs absolute with.
+        """
+        if options.get('netloc') is not None:
+            return [options['netloc']]
+        return set(
+            link_manager_pool.get_link_manager(plugin_type).netloc
+            for plugin_type in link_manager_pool.get_link_plugin_types()
+        ) or ['localhost:8000']
+
+    def scan(self, options, all_link_plugins, writer, run):
+        """
+        Check the links of `all_link_plugins` (only the changed ones in
+        incremental mode), write the broken ones to `writer` and return the
+        summary counters of the run.
+        """
+        verify_exists = options['verify_exists']
+
+        unknown_plugin_classes = []
+        count_all_links = 0
+        count_bad_links = 0
+
+        with self.metrics.phase('setup'):
+            # The URLs of internal links and of the pages of broken links,
+            # loaded upfront when the whole site is checked.
+            if self.is_site_wide(options):
+                self.page_urls = PageURLs.for_published_pages()
+            else:
+                self.page_urls = PageURLs()
+            load_phone_metadata()
+            link_managers = self.get_link_managers(options)
+
+        link_plugins = all_link_plugins
+        reused_results = LinkCheckResult.objects.none()
+        if options['incremental']:
+            watermark = self.get_watermark(options, run)
+            if watermark is not None:
+                self.log('Check only plugins changed since {}'.format(watermark))
+                link_plugins = self.get_changed_plugins(all_link_plugins, watermark, verify_exists)
+                reused_results = LinkCheckResult.objects.usable(verify_exists).filter(
+                    plugin_id__in=all_link_plugins.values('pk'),
+                ).exclude(
+                    plugin_id__in=link_plugins.values('pk'),
+                ).order_by('plugin_id', 'pk')
+
+        # Plugins checked before the run was interrupted are reported from
+        # their stored results, unless these were replaced since.
+        resumed_results = LinkCheckResult.objects.none()
+        if run is not None and run.last_plugin_id is not None:
+            self.log('Resume after plugin {}'.format(run.last_plugin_id))
+            usable_results = LinkCheckResult.objects.usable(verify_exists)
+            resumed_results = usable_results.filter(
+                plugin_id__in=link_plugins.filter(pk__lte=run.last_plugin_id).values('pk'),
+            ).order_by('plugin_id', 'pk')
+            link_plugins = link_plugins.filter(
+                Q(pk__gt=run.last_plugin_id) | ~Q(pk__in=usable_results.values('plugin_id')))
+
+        if not options.get('no_count'):
+            with self.metrics.phase('plugin_count'):
+                self.log('Will check {} Plugins'.format(link_plugins.count()))
         count = 0
-        for link_plugin in link_plugins.iterator():
-            count += 1
-            if not (count % 1000):
-                self.stdout.write('  Checked {} plugins...'.format(count))
-            plugin_inst, plugin_class = link_plugin.get_plugin_instance()
-            link_manager = self.get_link_manager(plugin_inst.plugin_type, scheme=scheme, netloc=netloc)
-
-            if link_manager:
-                link_reports = link_manager.check_link(
-                    plugin_inst,
-                    verify_exists=verify_exists,
-                )
-                # Convert to a list if only a single item was returned.
-                try:
-                    iter(link_reports)
-                except TypeError:
-                    # Result is not a list
-                    link_reports = [link_reports]
-
-                for link_report in link_reports:
-                    count_all_links += 1
-
-                    if not link_report.valid:
-                        slot = link_plugin.placeholder.slot
-                        slot_name = get_placeholder_conf('name', slot)
-                        if slot_name is None:
-                            slot_name = slot
-                        page = getattr(link_plugin.placeholder, 'page', None)
-                        if page:
-                            try:
-                                page_url = 'https://{}{}'.format(
-                                    page.site.domain,
-                                    page.get_absolute_url(plugin_inst.language),
-                                )
-                            except NoReverseMatch:
-                                page_url = ''
-                        else:
-                            infos = self.handle_placeholder_outside_cms(link_plugin)
-                            if infos is None:
+        started_at = clock()
+        link_plugins = link_plugins.values_list('pk', 'plugin_type')
+        chunk_size = self.get_option(options, 'chunk_size', 'CHUNK_SIZE')
+        for link_plugins_chunk in keyset_chunks(link_plugins, chunk_size):
+            with self.metrics.phase('instance_loading'):
+                plugins = []
+                for plugin_inst in self.get_plugin_instances(link_plugins_chunk):
+                    count += 1
+                    if not (count % 1000):
+                        self.log('  Checked {} plugins ({:.1f} plugins/s)...'.format(
+                            count, count / max(clock() - started_at, 0.001)))
+                    if plugin_inst is None:
+                        continue
+                    link_manager = link_managers.get(plugin_inst.plugin_type)
+
+                    if link_manager:
+                        plugins.append((plugin_inst, link_manager))
+                    elif plugin_inst.plugin_type not in unknown_plugin_classes:
+                        unknown_plugin_classes.append(plugin_inst.plugin_type)
+                pages = self.get_pages(set(plugin_inst.placeholder_id for plugin_inst, link_manager in plugins))
+
+            # The connection would be idle while links are checked (and URLs
+            # verified, before which the verifier closes it again).
+            close_idle_connections()
+            # The time spent verifying URLs is measured by the verifier.
+            with self.metrics.phase('offline_validation'):
+                link_reports_by_pk = self.get_link_reports(plugins, verify_exists, options['concurrency'])
+
+            with self.metrics.phase('reporting'):
+                results = []
+                references = []
+                for plugin_inst, link_manager in plugins:
+                    for link_report in link_reports_by_pk[plugin_inst.pk]:
+                        count_all_links += 1
+                        if link_report.url:
+                            references.append(LinkReference.from_link(
+                                plugin_inst, link_report.url, pages.get(plugin_inst.placeholder_id)))
+
+                        broken_link = None
+                        if not link_report.valid:
+                            broken_link = self.get_broken_link(plugin_inst, link_report, pages)
+                            if broken_link is None:
                                 # ignore orphaned placeholders
                                 continue
-                            page = infos['title']
-                            page_url = infos['url']
-
-                        bad_link = {
-                            'cls': plugin_inst.plugin_type,
-                            'page': page,
-                            'page_url': page_url,
-                            'pk': plugin_inst.pk,
-                            'slot': slot_name,
-                            'label': link_report.text,
-                            'url': link_report.url,
-                            'instance': plugin_inst,
-                        }
-                        self.stdout.write(
-                            'Broken link "{url}" on "{page_url}" plugin.id:{pk} placeholder:{slot}'.format(**bad_link)
-                        )
-                        bad_links.append(bad_link)
-            else:
-                if plugin_inst.plugin_type not in unknown_plugin_classes:
-                    unknown_plugin_classes.append(plugin_inst.plugin_type)
+                            self.log(
+                                'Broken link "{url}" on "{page_url}" plugin.id:{pk} placeholder:{slot}'.format(
+                                    **broken_link.as_dict())
+                            )
+                            count_bad_links += 1
+                            writer.write(broken_link)
+                        results.append(self.get_result(plugin_inst, link_report, broken_link, verify_exists))
+
+                plugin_ids = [plugin_inst.pk for plugin_inst, link_manager in plugins]
+                with transaction.atomic():
+                    LinkCheckResult.objects.replace(plugin_ids, results)
+                    LinkReference.objects.replace(plugin_ids, references)
+                    if run is not None:
+                        # The checkpoint from which an interrupted run resumes
+                        run.last_plugin_id = link_plugins_chunk[-1][0]
+                        run.save(update_fields=['last_plugin_id'])
+
+        self.metrics.incr('plugins', count)
+        with self.metrics.phase('reporting'):
+            for result in chain(resumed_results.iterator(), reused_results.iterator()):
+                count_all_links += 1
+                if not result.valid:
+                    count_bad_links += 1
+                    writer.write(result.as_broken_link())
+
+        self.log('Checked {} unique URLs for {} link references'.format(
+            self.verifier.unique_urls, self.verifier.references))
 
-        template = get_template(options['template'])
-        report = template.render({
-            'bad_links': bad_links,
+        return {
             'count_all_links': count_all_links,
-            'options': options,
-            'timestamp': now(),
+            'count_bad_links': count_bad_links,
+            'count_unique_urls': self.verifier.unique_urls,
+            'count_url_references': self.verifier.references,
             'unknown_plugin_classes': unknown_plugin_classes,
+        }
+
+    def scan_in_workers(self, options, workers, run):
+        """
+        Check the links with one worker process per shard, each with its own
+        database connection and HTTP client, then merge their partial
+        reports. Return the combined summary counters.
+        """
+        if options['incremental']:
+            # Only to record whether this run is a full one.
+            self.get_watermark(options, run)
+
+        directory = tempfile.mkdtemp(prefix='link-manager-')
+        try:
+            shards = []
+            for index in range(1, workers + 1):
+                shard_options = dict(
+                    (name, value) for name, value in options.items() if name not in ('stdout', 'stderr'))
+                shard_options.update({
+                    'shard': '{0}/{1}'.format(index, workers),
+                    'workers': 1,
+                    'format': 'jsonl',
+                    'output': os.path.join(directory, 'shard-{0}.jsonl'.format(index)),
+                    'log': os.path.join(directory, 'shard-{0}.log'.format(index)),
+                    'metrics_file': os.path.join(directory, 'shard-{0}.metrics.json'.format(index)),
+                    'mail_managers': False,
+                    'template': None,
+                })
+                shards.append(shard_options)
+
+            self.log('Check links with {} workers...'.format(workers))
+            self.run_shards(shards, workers)
+
+            for shard_options in shards:
+                with io.open(shard_options['log'], encoding='utf-8') as log:
+                    self.log('Shard {}:\n{}'.format(shard_options['shard'], log.read().rstrip()))
+                with io.open(shard_options['metrics_file'], encoding='utf-8') as metrics_file:
+                    self.metrics.update(json.load(metrics_file))
+            return self.merge_reports([shard_options['output'] for shard_options in shards])
+        finally:
+            shutil.rmtree(directory)
+
+    def run_shards(self, shards, workers):
+        """
+        Run check_links over each of the `shards` options, in `workers`
+        processes.
+        """
+        # Forked processes must not share the connections of this one.
+        connections.close_all()
+        pool = multiprocessing.Pool(workers)
+        try:
+            pool.map(check_shard, shards)
+        finally:
+            pool.close()
+            pool.join()
+
+    def merge_reports(self, paths):
+        """
+        Write the broken links of the partial reports at `paths` to the
+        writer, and return their combined summary counters.
+        """
+        streams = [io.open(path, encoding='utf-8') for path in paths]
+        try:
+            return merge_reports(streams, self.writer)
+        except ValueError as exception:
+            raise CommandError(force_text(exception))
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def check(self, options, shard, workers):
+        """
+        Check the links (or merge partial reports), writing the broken ones
+        to the writer, and return the summary counters of the run.
+        """
+        if options.get('merge'):
+            self.log('Merge {} partial reports...'.format(len(options['merge'])))
+            return self.merge_reports(options['merge'])
+
+        self.log("Start link check...")
+        link_plugins = self.get_link_plugins(options, shard)
+
+        # Runs over the whole site are recorded, to be the starting point
+        # of the next incremental runs.
+        is_site_wide = shard is None and self.is_site_wide(options)
+        run = None
+        if options.get('resume'):
+            if not is_site_wide or workers > 1:
+                raise CommandError('--resume only applies to runs over the whole site, without --shard or --workers')
+            run = LinkCheckRun.objects.get_resumable(options['verify_exists'])
+            if run is None:
+                self.log('No interrupted run to resume, starting a new one')
+            else:
+                self.log('Resume the run started at {}'.format(run.started_at))
+                options['incremental'] = run.incremental
+        if is_site_wide and run is None:
+            run = LinkCheckRun.objects.create(
+                started_at=self.started_at, verify_exists=options['verify_exists'],
+                incremental=options['incremental'])
+
+        if workers > 1:
+            summary = self.scan_in_workers(options, workers, run)
+        else:
+            summary = self.scan(options, link_plugins, self.writer, run)
+
+        if run is not None:
+            # Forget the results and references of plugins which are not
+            # checked anymore.
+            LinkCheckResult.objects.exclude(plugin_id__in=link_plugins.values('pk')).delete()
+            LinkReference.objects.exclude(plugin_id__in=link_plugins.values('pk')).delete()
+            run.finished_at = now()
+            run.save()
+        return summary
+
+    def report_metrics(self, options, summary):
+        """
+        Log the measures of the run, and write them to --metrics-file.
+        """
+        self.metrics.counters.update({
+            'links': summary['count_all_links'],
+            'broken_links': summary['count_bad_links'],
+            'unique_urls': summary['count_unique_urls'],
+            'url_references': summary['count_url_references'],
         })
+        for line in self.metrics.format():
+            self.log(line)
+        if options.get('metrics_file'):
+            with io.open(options['metrics_file'], 'w', encoding='utf-8') as metrics_file:
+                metrics_file.write(six.text_type(json.dumps(self.metrics.as_dict(), indent=2, sort_keys=True)))
+
+    def handle(self, *args, **options):
+        """
+        We're only interested in link plugins that are either not on any page or
+        are on a published page.
+
+        NOTE: This could be a large set.
+        """
+        shard = self.get_shard(options)
+        workers = options.get('workers') or 1
+        if shard is not None and workers > 1:
+            raise CommandError('--shard and --workers cannot be combined')
+        if shard is not None and options['format'] != 'jsonl':
+            # Only jsonl reports end with the summary that --merge combines.
+            raise CommandError('--shard requires --format jsonl, for its report to be merged')
+        if options.get('chunk_size') is not None and options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        concurrency = options['concurrency']
+        if options['no_cache']:
+            store = None
+        else:
+            store = VerdictStore(refresh=options['refresh_cache'])
+        host_concurrency = self.get_option(options, 'host_concurrency', 'HOST_CONCURRENCY')
+        scheduler = HostScheduler(
+            concurrency=concurrency,
+            host_interval=self.get_option(options, 'host_interval', 'HOST_INTERVAL'),
+            host_concurrency=host_concurrency,
+        )
+        self.metrics = Metrics()
+        client = HttpClient(
+            connect_timeout=self.get_option(options, 'connect_timeout', 'CONNECT_TIMEOUT'),
+            read_timeout=self.get_option(options, 'read_timeout', 'READ_TIMEOUT'),
+            max_redirects=self.get_option(options, 'max_redirects', 'MAX_REDIRECTS'),
+            retries=self.get_option(options, 'retries', 'RETRIES'),
+            retry_backoff=self.get_option(options, 'retry_backoff', 'RETRY_BACKOFF'),
+            pool_size=host_concurrency,
+            metrics=self.metrics,
+        )
+        resolver = None
+        if options.get('resolve_locally'):
+            resolver = LocalResolver(netlocs=self.get_local_netlocs(options))
+        self.verifier = LinkVerifier(
+            scheduler=scheduler, client=client, store=store, resolver=resolver, metrics=self.metrics)
+        self._template_slots = {}
+
+        # Closed even when the run fails.
+        report_stream = None
+        try:
+            if options['mail_managers']:
+                # The body of the email
+                report_stream = io.StringIO()
+            elif options['output']:
+                report_stream = io.open(options['output'], 'w', encoding='utf-8')
+            else:
+                report_stream = self.stdout
+            if report_stream is self.stdout and options['format'] in ('jsonl', 'csv'):
+                # Keep the progress messages out of the machine-readable output.
+                self.log_stream = self.stderr
+            else:
+                self.log_stream = self.stdout
+            writer = self.writer = get_report_writer(options['format'], report_stream, options['template'])
+            timestamp = self.started_at = now()
+            writer.start({'options': options, 'timestamp': timestamp})
+
+            with self.metrics.measure():
+                summary = self.check(options, shard, workers)
+                with self.metrics.phase('rendering'):
+                    writer.finish(dict(
+                        summary,
+                        options=options,
+                        partial=shard is not None,
+                        timestamp=timestamp,
+                    ))
+            self.report_metrics(options, summary)
+        finally:
+            client.close()
+            if report_stream is not None and report_stream is not self.stdout and not options['mail_managers']:
+                report_stream.close()
 
         if options['mail_managers']:
             try:
                 mail_managers(
-                    _('Broken link report: {0}').format(now()),
-                    report,
+                    _('Broken link report: {0}').format(timestamp),
+                    report_stream.getvalue(),
                     fail_silently=False
                 )
-                self.stdout.write('Successfully sent broken link report via email')
+                self.log('Successfully sent broken link report via email')
             except Exception as exception:
                 self.stderr.write('ERROR: Report could not be sent via mail: {0}'.format(exception))
-        else:
-            self.stdout.write(report)
+        elif options['output']:
+            self.log('Report written to {0}'.format(options['output']))
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import LinkReference
+
+
+class Command(BaseCommand):
+    help = """List the plugins linking to a URL or to a host, from the links recorded by check_links."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='store', dest='url', default=None,
+            help='Find the links to the given URL (compared in canonical form).'
+        )
+        parser.add_argument(
+            '--host', action='store', dest='host', default=None,
+            help='Find the links to the given host name, e.g. www.example.com.'
+        )
+
+    def handle(self, *args, **options):
+        if (options['url'] is None) == (options['host'] is None):
+            raise CommandError('Give either --url or --host')
+        if options['url'] is not None:
+            references = LinkReference.objects.for_url(options['url'])
+        else:
+            references = LinkReference.objects.for_host(options['host'])
+
+        count = 0
+        rows = references.order_by('page_id', 'plugin_id').values_list(
+            'page_id', 'language', 'slot', 'plugin_type', 'plugin_id', 'url')
+        for page_id, language, slot, plugin_type, plugin_id, url in rows.iterator():
+            count += 1
+            self.stdout.write('page:{page} language:{language} placeholder:{slot} {type} plugin.id:{pk} {url}'.format(
+                page=page_id if page_id is not None else '-', language=language, slot=slot,
+                type=plugin_type, pk=plugin_id, url=url,
+            ))
+        self.stderr.write('{0} links found'.format(count))
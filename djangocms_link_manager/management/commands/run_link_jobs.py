@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import signal
+import sys
+import threading
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from ...models import AnalysisJob
+
+
+# Seconds between two heartbeats of a running job. It must stay well below
+# LINK_MANAGER_JOB_STALE_AFTER.
+HEARTBEAT_INTERVAL = 30
+
+
+class JobOutput(object):
+    """
+    A file-like object appending what is written to the output of a job,
+    flushing it to the database at most every `interval` seconds so that the
+    views can show partial results.
+    """
+
+    def __init__(self, job, interval=2):
+        self.job = job
+        self.interval = interval
+        self.buffer = []
+        self.flushed_at = time.time()
+
+    def write(self, text):
+        self.buffer.append(text)
+        if time.time() - self.flushed_at >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.job.append_output(''.join(self.buffer))
+            self.buffer = []
+        self.flushed_at = time.time()
+
+    def isatty(self):
+        return False
+
+
+class Heartbeat(threading.Thread):
+    """
+    Records that the job is still running every `interval` seconds, until
+    stopped, so that the jobs of a worker which died can be told apart.
+    """
+    daemon = True
+
+    def __init__(self, job, interval=HEARTBEAT_INTERVAL):
+        super(Heartbeat, self).__init__()
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                self.job.beat()
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def exit_on_sigterm(signum, frame):
+    # Let the running job be marked as failed before exiting.
+    sys.exit(1)
+
+
+class Command(BaseCommand):
+    help = """Run the link analyses requested from the link manager's views."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true', dest='once', default=False,
+            help='Run the queued jobs, then exit instead of waiting for new ones.'
+        )
+        parser.add_argument(
+            '--sleep', action='store', dest='sleep', type=float, default=5,
+            help='Seconds to wait between two checks for new jobs (default: 5).'
+        )
+
+    def run_job(self, job):
+        self.stdout.write('Running job {0}...'.format(job.pk))
+        output = JobOutput(job)
+        heartbeat = Heartbeat(job)
+        heartbeat.start()
+        try:
+            call_command(
+                'check_links',
+                verify_exists=job.verify_exists,
+                only_page_id=job.page_id,
+                mail_managers=job.mail_managers,
+                netloc=job.host or None,
+                stdout=output,
+                stderr=output,
+            )
+        except Exception as exception:
+            output.write('ERROR: {0}\n'.format(exception))
+            output.flush()
+            job.finish(AnalysisJob.FAILED)
+            self.stderr.write('Job {0} failed: {1}'.format(job.pk, exception))
+        except BaseException:
+            # Interrupted (Ctrl-C, SIGTERM)
+            output.write('ERROR: The analysis was interrupted\n')
+            output.flush()
+            job.finish(AnalysisJob.FAILED)
+            raise
+        else:
+            output.flush()
+            job.finish(AnalysisJob.DONE)
+            self.stdout.write('Job {0} done'.format(job.pk))
+        finally:
+            heartbeat.stop()
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, exit_on_sigterm)
+        while True:
+            failed = AnalysisJob.objects.fail_stale()
+            if failed:
+                self.stderr.write('Marked {0} interrupted jobs as failed'.format(failed))
+            job = AnalysisJob.objects.claim_next()
+            if job is not None:
+                self.run_job(job)
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
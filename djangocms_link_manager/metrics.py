@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import threading
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:  # pragma: no cover
+    # Python 3.x
+    from urllib.parse import urlparse
+except ImportError:  # pragma: no cover
+    # Python 2.x
+    from urlparse import urlparse
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import CursorWrapper
+
+import attr
+
+from .scheduler import clock
+
+
+# Upper bounds (in seconds) of the buckets of the HTTP latency histograms,
+# the last bucket holding the slower requests.
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class CountingCursorWrapper(CursorWrapper):
+
+    def __init__(self, cursor, db, counter):
+        super(CountingCursorWrapper, self).__init__(cursor, db)
+        self.counter = counter
+
+    def execute(self, sql, params=None):
+        self.counter.count += 1
+        return super(CountingCursorWrapper, self).execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        self.counter.count += 1
+        return super(CountingCursorWrapper, self).executemany(sql, param_list)
+
+
+class QueryCounter(object):
+    """
+    Counts the queries made through a connection while active, by wrapping
+    the cursors the connection makes. The debug cursor is left alone, so
+    queries are still logged when they would be (DEBUG, CaptureQueriesContext).
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+        self.count = 0
+
+    def wrap(self, make_cursor):
+        def make_counting_cursor(cursor):
+            return CountingCursorWrapper(make_cursor(cursor), self.connection, self)
+        return make_counting_cursor
+
+    def __enter__(self):
+        # The methods overridden on the connection itself, as by an outer counter.
+        self.overrides = {}
+        for name in ('make_cursor', 'make_debug_cursor'):
+            if name in vars(self.connection):
+                self.overrides[name] = vars(self.connection)[name]
+            setattr(self.connection, name, self.wrap(getattr(self.connection, name)))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for name in ('make_cursor', 'make_debug_cursor'):
+            if name in self.overrides:
+                setattr(self.connection, name, self.overrides[name])
+            else:
+                delattr(self.connection, name)
+
+
+def get_rate(part, total):
+    return float(part) / total if total else None
+
+
+@attr.s(slots=True)
+class Metrics(object):
+    """
+    Measures of a run: the duration and number of queries of its phases,
+    counters, and the number and latency of HTTP requests per host.
+
+    Phases may be nested, the time and queries of an inner phase are not
+    counted in the outer one. HTTP requests may be recorded from any thread.
+    """
+    queries = attr.ib(default=attr.Factory(QueryCounter))
+    phases = attr.ib(default=attr.Factory(OrderedDict), init=False)
+    counters = attr.ib(default=attr.Factory(dict), init=False)
+    hosts = attr.ib(default=attr.Factory(dict), init=False)
+    duration = attr.ib(default=0, init=False)
+    _started_at = attr.ib(default=None, init=False)
+    _stack = attr.ib(default=attr.Factory(list), init=False)
+    _lock = attr.ib(default=attr.Factory(threading.Lock), init=False)
+
+    @contextmanager
+    def measure(self):
+        """
+        Count the queries of the run (and measure its duration) while active.
+        """
+        self._started_at = clock()
+        with self.queries:
+            try:
+                yield self
+            finally:
+                self.duration += clock() - self._started_at
+
+    @contextmanager
+    def phase(self, name):
+        # The time and queries of the inner phases, to be deducted.
+        inner = [0, 0]
+        self._stack.append(inner)
+        started_at, queries = clock(), self.queries.count
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            seconds = clock() - started_at
+            query_count = self.queries.count - queries
+            if self._stack:
+                self._stack[-1][0] += seconds
+                self._stack[-1][1] += query_count
+            totals = self.phases.setdefault(name, {'seconds': 0, 'queries': 0})
+            totals['seconds'] += seconds - inner[0]
+            totals['queries'] += query_count - inner[1]
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_request(self, url, seconds, status_code=None):
+        """
+        Record an HTTP request to `url`, which took `seconds`, and got
+        `status_code` or no response at all.
+        """
+        host = urlparse(url).netloc
+        bucket = len([bound for bound in LATENCY_BUCKETS if bound < seconds])
+        with self._lock:
+            totals = self.hosts.get(host)
+            if totals is None:
+                totals = self.hosts[host] = {
+                    'requests': 0, 'errors': 0, 'seconds': 0, 'latency': [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            totals['requests'] += 1
+            totals['seconds'] += seconds
+            totals['latency'][bucket] += 1
+            if status_code is None:
+                totals['errors'] += 1
+
+    def update(self, data):
+        """
+        Add the measures of another run, as returned by `as_dict()`.
+        """
+        self.queries.count += data['queries']
+        for name, phase in data['phases'].items():
+            totals = self.phases.setdefault(name, {'seconds': 0, 'queries': 0})
+            totals['seconds'] += phase['seconds']
+            totals['queries'] += phase['queries']
+        for name, value in data['counters'].items():
+            self.incr(name, value)
+        for host, host_totals in data['hosts'].items():
+            totals = self.hosts.setdefault(host, {
+                'requests': 0, 'errors': 0, 'seconds': 0, 'latency': [0] * (len(LATENCY_BUCKETS) + 1),
+            })
+            for name in ('requests', 'errors', 'seconds'):
+                totals[name] += host_totals[name]
+            totals['latency'] = [a + b for a, b in zip(totals['latency'], host_totals['latency'])]
+
+    def as_dict(self):
+        counters = self.counters
+        return {
+            'duration': self.duration,
+            'queries': self.queries.count,
+            'phases': self.phases,
+            'counters': counters,
+            'hosts': self.hosts,
+            'latency_buckets': LATENCY_BUCKETS,
+            'links_per_second': get_rate(counters.get('links', 0), self.duration),
+            'store_hit_rate': get_rate(
+                counters.get('store_hits', 0), counters.get('store_hits', 0) + counters.get('store_misses', 0)),
+            'url_hit_rate': get_rate(
+                counters.get('url_references', 0) - counters.get('unique_urls', 0), counters.get('url_references', 0)),
+        }
+
+    def format(self):
+        """
+        Return the lines of a human-readable summary of the measures.
+        """
+        data = self.as_dict()
+        lines = ['Run took {0:.2f}s and {1} queries'.format(data['duration'], data['queries'])]
+        for name, phase in data['phases'].items():
+            lines.append('  {0}: {1:.2f}s, {2} queries'.format(name, phase['seconds'], phase['queries']))
+        for name, rate in (('Links per second', data['links_per_second']),
+                           ('Verdict store hit rate', data['store_hit_rate']),
+                           ('URL hit rate', data['url_hit_rate'])):
+            if rate is not None:
+                lines.append('{0}: {1:.2f}'.format(name, rate))
+        if data['hosts']:
+            lines.append('HTTP requests per host:')
+        for host, totals in sorted(data['hosts'].items()):
+            lines.append('  {0}: {1} requests, {2} errors, {3:.3f}s on average'.format(
+                host, totals['requests'], totals['errors'], totals['seconds'] / totals['requests']))
+        return lines
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkVerdict',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('url_hash', models.CharField(unique=True, max_length=64, verbose_name='URL hash')),
+                ('url', models.TextField(verbose_name='URL')),
+                ('status_code', models.PositiveSmallIntegerField(
+                    help_text='Empty if the URL could not be fetched.', null=True, verbose_name='status code',
+                    blank=True)),
+                ('checked_at', models.DateTimeField(verbose_name='checked at')),
+                ('ttl', models.PositiveIntegerField(help_text='In seconds.', verbose_name='time to live')),
+            ],
+            options={
+                'verbose_name': 'link verdict',
+                'verbose_name_plural': 'link verdicts',
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_link_manager', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkCheckResult',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('plugin_id', models.IntegerField(verbose_name='plugin id', db_index=True)),
+                ('plugin_type', models.CharField(max_length=50, verbose_name='plugin type')),
+                ('url', models.TextField(null=True, verbose_name='URL', blank=True)),
+                ('valid', models.BooleanField(verbose_name='valid', db_index=True)),
+                ('reason', models.CharField(max_length=32, verbose_name='reason', blank=True)),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='status code', blank=True)),
+                ('verify_exists', models.BooleanField(default=False, verbose_name='verify exists')),
+                ('checked_at', models.DateTimeField(verbose_name='checked at')),
+                ('page', models.CharField(max_length=255, verbose_name='page', blank=True)),
+                ('page_url', models.TextField(verbose_name='page URL', blank=True)),
+                ('slot', models.CharField(max_length=255, verbose_name='slot', blank=True)),
+                ('label', models.TextField(verbose_name='label', blank=True)),
+            ],
+            options={
+                'verbose_name': 'link check result',
+                'verbose_name_plural': 'link check results',
+            },
+        ),
+        migrations.CreateModel(
+            name='LinkCheckRun',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('started_at', models.DateTimeField(verbose_name='started at', db_index=True)),
+                ('finished_at', models.DateTimeField(null=True, verbose_name='finished at', blank=True)),
+                ('verify_exists', models.BooleanField(default=False, verbose_name='verify exists')),
+                ('incremental', models.BooleanField(default=False, verbose_name='incremental')),
+            ],
+            options={
+                'verbose_name': 'link check run',
+                'verbose_name_plural': 'link check runs',
+            },
+        ),
+    ]
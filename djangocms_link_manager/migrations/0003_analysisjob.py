@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_link_manager', '0002_link_check_results'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('page_id', models.IntegerField(null=True, verbose_name='page id', blank=True)),
+                ('verify_exists', models.BooleanField(default=False, verbose_name='verify exists')),
+                ('mail_managers', models.BooleanField(default=False, verbose_name='mail managers')),
+                ('host', models.CharField(max_length=255, verbose_name='host', blank=True)),
+                ('status', models.CharField(
+                    default='queued', max_length=10, verbose_name='status', db_index=True,
+                    choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')])),
+                ('output', models.TextField(default='', verbose_name='output', blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('started_at', models.DateTimeField(null=True, verbose_name='started at', blank=True)),
+                ('heartbeat_at', models.DateTimeField(
+                    help_text='Last time the worker running the job gave signs of life.',
+                    null=True, verbose_name='heartbeat at', blank=True)),
+                ('finished_at', models.DateTimeField(null=True, verbose_name='finished at', blank=True)),
+                ('pending_key', models.CharField(
+                    verbose_name='pending key', max_length=64, null=True, editable=False, unique=True, blank=True)),
+            ],
+            options={
+                'verbose_name': 'analysis job',
+                'verbose_name_plural': 'analysis jobs',
+            },
+        ),
+    ]
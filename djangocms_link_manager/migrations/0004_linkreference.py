@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_link_manager', '0003_analysisjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkReference',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('url_hash', models.CharField(max_length=64, verbose_name='URL hash', db_index=True)),
+                ('url', models.TextField(verbose_name='URL')),
+                ('host', models.CharField(db_index=True, max_length=255, verbose_name='host', blank=True)),
+                ('plugin_id', models.IntegerField(verbose_name='plugin id', db_index=True)),
+                ('plugin_type', models.CharField(max_length=50, verbose_name='plugin type')),
+                ('page_id', models.IntegerField(db_index=True, null=True, verbose_name='page id', blank=True)),
+                ('language', models.CharField(max_length=15, verbose_name='language', blank=True)),
+                ('slot', models.CharField(max_length=255, verbose_name='slot', blank=True)),
+            ],
+            options={
+                'verbose_name': 'link reference',
+                'verbose_name_plural': 'link references',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_link_manager', '0004_linkreference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='linkcheckrun',
+            name='last_plugin_id',
+            field=models.IntegerField(
+                help_text='The last plugin checked, from which an interrupted run is resumed.',
+                null=True, verbose_name='last plugin id', blank=True),
+        ),
+    ]
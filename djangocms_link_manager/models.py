@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+from hashlib import sha256
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat
+from django.utils.encoding import force_bytes, force_text, python_2_unicode_compatible
+from django.utils.timezone import now
+from django.utils.translation import ugettext_lazy as _
+
+from .conf import get_setting
+from .reports import BrokenLink
+from .utils import is_success, normalize_host, normalize_link
+
+
+def get_url_hash(url):
+    return sha256(force_bytes(url)).hexdigest()
+
+
+def get_job_key(page_id, verify_exists, host):
+    """
+    Return the key of the analyses of `page_id` made the same way, which at
+    most one pending job holds.
+    """
+    return get_url_hash('{0}:{1}:{2}'.format(page_id or '', int(verify_exists), host))
+
+
+class LinkVerdictQuerySet(models.QuerySet):
+
+    def for_urls(self, urls):
+        return self.filter(url_hash__in=[get_url_hash(url) for url in urls])
+
+
+@python_2_unicode_compatible
+class LinkVerdict(models.Model):
+    """
+    The outcome of the last existence check of a (normalized) URL.
+    """
+    url_hash = models.CharField(_('URL hash'), max_length=64, unique=True)
+    url = models.TextField(_('URL'))
+    status_code = models.PositiveSmallIntegerField(
+        _('status code'), blank=True, null=True,
+        help_text=_('Empty if the URL could not be fetched.'))
+    checked_at = models.DateTimeField(_('checked at'))
+    ttl = models.PositiveIntegerField(_('time to live'), help_text=_('In seconds.'))
+
+    objects = LinkVerdictQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('link verdict')
+        verbose_name_plural = _('link verdicts')
+
+    def __str__(self):
+        return '{0} ({1})'.format(self.url, self.status_code)
+
+    def save(self, *args, **kwargs):
+        self.url_hash = get_url_hash(self.url)
+        super(LinkVerdict, self).save(*args, **kwargs)
+
+    @property
+    def exists(self):
+        return is_success(self.status_code)
+
+    @property
+    def expires_at(self):
+        return self.checked_at + timedelta(seconds=self.ttl)
+
+    def is_fresh(self):
+        return now() < self.expires_at
+
+    @classmethod
+    def get_ttl(cls, status_code):
+        if is_success(status_code):
+            return get_setting('VERDICT_TTL_SUCCESS')
+        return get_setting('VERDICT_TTL_FAILURE')
+
+
+class LinkCheckRunQuerySet(models.QuerySet):
+
+    def finished(self):
+        return self.filter(finished_at__isnull=False)
+
+    def get_watermark(self, verify_exists=False):
+        """
+        Return the start of the last finished run (which verified that links
+        exist, if `verify_exists`), or None.
+        """
+        runs = self.finished()
+        if verify_exists:
+            runs = runs.filter(verify_exists=True)
+        run = runs.order_by('-started_at').first()
+        return run.started_at if run is not None else None
+
+    def get_last_full_sweep(self, verify_exists=False):
+        runs = self.finished().filter(incremental=False)
+        if verify_exists:
+            runs = runs.filter(verify_exists=True)
+        run = runs.order_by('-started_at').first()
+        return run.started_at if run is not None else None
+
+    def get_resumable(self, verify_exists=False):
+        """
+        Return the last run if it was interrupted (and verified that links
+        exist, as requested), or None.
+        """
+        run = self.order_by('-started_at', '-pk').first()
+        if run is None or run.finished_at is not None or run.verify_exists != verify_exists:
+            return None
+        return run
+
+
+@python_2_unicode_compatible
+class LinkCheckRun(models.Model):
+    """
+    A site-wide run of check_links. The start of the last finished run is
+    the watermark of incremental runs.
+    """
+    started_at = models.DateTimeField(_('started at'), db_index=True)
+    finished_at = models.DateTimeField(_('finished at'), blank=True, null=True)
+    verify_exists = models.BooleanField(_('verify exists'), default=False)
+    incremental = models.BooleanField(_('incremental'), default=False)
+    last_plugin_id = models.IntegerField(
+        _('last plugin id'), blank=True, null=True,
+        help_text=_('The last plugin checked, from which an interrupted run is resumed.'))
+
+    objects = LinkCheckRunQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('link check run')
+        verbose_name_plural = _('link check runs')
+
+    def __str__(self):
+        return '{0}'.format(self.started_at)
+
+
+class LinkCheckResultQuerySet(models.QuerySet):
+
+    def usable(self, verify_exists=False):
+        """
+        Return the results that can be reused by a run, i.e. which verified
+        that links exist, if the run does.
+        """
+        if verify_exists:
+            return self.filter(verify_exists=True)
+        return self.all()
+
+    def replace(self, plugin_ids, results):
+        """
+        Replace the stored results of the given plugins.
+        """
+        self.filter(plugin_id__in=plugin_ids).delete()
+        self.bulk_create(results)
+
+
+@python_2_unicode_compatible
+class LinkCheckResult(models.Model):
+    """
+    The result of the last check of a link of a plugin. Broken links also
+    keep what is needed to report them again without checking the plugin.
+    """
+    plugin_id = models.IntegerField(_('plugin id'), db_index=True)
+    plugin_type = models.CharField(_('plugin type'), max_length=50)
+    url = models.TextField(_('URL'), blank=True, null=True)
+    valid = models.BooleanField(_('valid'), db_index=True)
+    reason = models.CharField(_('reason'), max_length=32, blank=True)
+    status_code = models.PositiveSmallIntegerField(_('status code'), blank=True, null=True)
+    verify_exists = models.BooleanField(_('verify exists'), default=False)
+    checked_at = models.DateTimeField(_('checked at'))
+    page = models.CharField(_('page'), max_length=255, blank=True)
+    page_url = models.TextField(_('page URL'), blank=True)
+    slot = models.CharField(_('slot'), max_length=255, blank=True)
+    label = models.TextField(_('label'), blank=True)
+
+    objects = LinkCheckResultQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('link check result')
+        verbose_name_plural = _('link check results')
+
+    def __str__(self):
+        return '{0} ({1})'.format(self.url, self.plugin_id)
+
+    @classmethod
+    def from_link(cls, plugin, link_report, broken_link, verify_exists, checked_at):
+        """
+        Return the (unsaved) result of a link report of `plugin`, keeping
+        what `broken_link` reports when the link is broken.
+        """
+        result = cls(
+            plugin_id=plugin.pk,
+            plugin_type=plugin.plugin_type,
+            url=link_report.url and force_text(link_report.url),
+            valid=bool(link_report.valid),
+            status_code=link_report.status_code,
+            verify_exists=verify_exists,
+            checked_at=checked_at,
+        )
+        if broken_link is not None:
+            result.reason = broken_link.reason
+            result.page = broken_link.page[:255]
+            result.page_url = broken_link.page_url
+            result.slot = broken_link.slot[:255]
+            result.label = broken_link.label
+        return result
+
+    def as_broken_link(self):
+        return BrokenLink(
+            cls=self.plugin_type,
+            pk=self.plugin_id,
+            page=self.page,
+            page_url=self.page_url,
+            slot=self.slot,
+            label=self.label,
+            url=self.url,
+            reason=self.reason,
+            status_code=self.status_code,
+        )
+
+
+class LinkReferenceQuerySet(models.QuerySet):
+
+    def for_url(self, url):
+        """
+        Return the references to `url`, or to any URL with the same
+        canonical form.
+        """
+        return self.filter(url_hash=get_url_hash(normalize_link(url)[0]))
+
+    def for_host(self, host):
+        return self.filter(host=normalize_host(host))
+
+    def replace(self, plugin_ids, references):
+        """
+        Replace the stored references of the given plugins.
+        """
+        self.filter(plugin_id__in=plugin_ids).delete()
+        self.bulk_create(references)
+
+
+@python_2_unicode_compatible
+class LinkReference(models.Model):
+    """
+    A link of a plugin, denormalized and indexed by URL and host so that the
+    plugins and pages linking to a URL or a host are found with one query.
+    """
+    url_hash = models.CharField(_('URL hash'), max_length=64, db_index=True)
+    url = models.TextField(_('URL'))
+    host = models.CharField(_('host'), max_length=255, blank=True, db_index=True)
+    plugin_id = models.IntegerField(_('plugin id'), db_index=True)
+    plugin_type = models.CharField(_('plugin type'), max_length=50)
+    page_id = models.IntegerField(_('page id'), blank=True, null=True, db_index=True)
+    language = models.CharField(_('language'), max_length=15, blank=True)
+    slot = models.CharField(_('slot'), max_length=255, blank=True)
+
+    objects = LinkReferenceQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('link reference')
+        verbose_name_plural = _('link references')
+
+    def __str__(self):
+        return '{0} ({1})'.format(self.url, self.plugin_id)
+
+    @classmethod
+    def from_link(cls, plugin, url, page=None):
+        """
+        Return the (unsaved) reference to `url` of `plugin`, on `page`.
+        """
+        url, host = normalize_link(force_text(url))
+        return cls(
+            url_hash=get_url_hash(url),
+            url=url,
+            host=host[:255],
+            plugin_id=plugin.pk,
+            plugin_type=plugin.plugin_type,
+            page_id=page.pk if page is not None else None,
+            language=plugin.language,
+            slot=plugin.placeholder.slot[:255],
+        )
+
+
+class AnalysisJobQuerySet(models.QuerySet):
+
+    def stale(self):
+        """
+        Return the running jobs whose worker stopped giving signs of life
+        (e.g. it was killed), for LINK_MANAGER_JOB_STALE_AFTER seconds.
+        """
+        cutoff = now() - timedelta(seconds=get_setting('JOB_STALE_AFTER'))
+        return self.filter(status=AnalysisJob.RUNNING).filter(
+            Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff))
+
+    def pending(self):
+        return self.filter(status__in=[AnalysisJob.QUEUED, AnalysisJob.RUNNING]).exclude(
+            pk__in=self.stale().values('pk'))
+
+    def fail_stale(self):
+        """
+        Mark the stale jobs as failed, and return their number.
+        """
+        return self.filter(pk__in=list(self.stale().values_list('pk', flat=True))).update(
+            status=AnalysisJob.FAILED,
+            finished_at=now(),
+            pending_key=None,
+            output=Concat('output', Value('ERROR: The analysis was interrupted\n'), output_field=models.TextField()),
+        )
+
+    def enqueue(self, page_id=None, verify_exists=False, host='', mail_managers=False):
+        """
+        Return a new queued job, or the pending job analyzing the same page
+        the same way for the same host, if any. Pending jobs hold a unique
+        key, so that concurrent requests never queue the same analysis twice.
+        """
+        key = get_job_key(page_id, verify_exists, host)
+        while True:
+            job = self.pending().filter(pending_key=key).first()
+            if job is not None:
+                return job
+            if self.filter(pending_key=key).exists():
+                # The job holding the key is stale, release it.
+                self.fail_stale()
+            try:
+                with transaction.atomic():
+                    return self.create(
+                        page_id=page_id, verify_exists=verify_exists, host=host, mail_managers=mail_managers,
+                        pending_key=key)
+            except IntegrityError:
+                # A concurrent request queued the same analysis.
+                pass
+
+    def claim_next(self):
+        """
+        Mark the oldest queued job as running and return it, or None. Jobs are
+        claimed with a conditional update, so that concurrent workers never
+        run the same job.
+        """
+        while True:
+            job = self.filter(status=AnalysisJob.QUEUED).order_by('pk').first()
+            if job is None:
+                return None
+            started_at = now()
+            claimed = self.filter(pk=job.pk, status=AnalysisJob.QUEUED).update(
+                status=AnalysisJob.RUNNING, started_at=started_at, heartbeat_at=started_at)
+            if claimed:
+                job.status = AnalysisJob.RUNNING
+                job.started_at = job.heartbeat_at = started_at
+                return job
+
+
+@python_2_unicode_compatible
+class AnalysisJob(models.Model):
+    """
+    A check_links run requested from the link manager's views, and run in the
+    background by the run_link_jobs command.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, _('Queued')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    )
+
+    page_id = models.IntegerField(_('page id'), blank=True, null=True)
+    verify_exists = models.BooleanField(_('verify exists'), default=False)
+    mail_managers = models.BooleanField(_('mail managers'), default=False)
+    host = models.CharField(_('host'), max_length=255, blank=True)
+    status = models.CharField(_('status'), max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    output = models.TextField(_('output'), blank=True, default='')
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    started_at = models.DateTimeField(_('started at'), blank=True, null=True)
+    heartbeat_at = models.DateTimeField(
+        _('heartbeat at'), blank=True, null=True,
+        help_text=_('Last time the worker running the job gave signs of life.'))
+    finished_at = models.DateTimeField(_('finished at'), blank=True, null=True)
+    # Set while the job is queued or running (see get_job_key).
+    pending_key = models.CharField(_('pending key'), max_length=64, blank=True, null=True, unique=True, editable=False)
+
+    objects = AnalysisJobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('analysis job')
+        verbose_name_plural = _('analysis jobs')
+
+    def __str__(self):
+        return '{0} ({1})'.format(self.pk, self.status)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def append_output(self, text):
+        """
+        Append text to the output in the database, without rewriting it.
+        """
+        AnalysisJob.objects.filter(pk=self.pk).update(
+            output=Concat('output', Value(text), output_field=models.TextField()))
+
+    def beat(self):
+        self.heartbeat_at = now()
+        AnalysisJob.objects.filter(pk=self.pk).update(heartbeat_at=self.heartbeat_at)
+
+    def finish(self, status):
+        self.status = status
+        self.finished_at = now()
+        self.pending_key = None
+        AnalysisJob.objects.filter(pk=self.pk).update(
+            status=self.status, finished_at=self.finished_at, pending_key=None)
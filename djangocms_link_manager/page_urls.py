@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.urlresolvers import NoReverseMatch, reverse
+
+from django.db.models import Q
+
+from cms.models import Page, Title
+from cms.utils.i18n import force_language
+
+import attr
+
+
+@attr.s(slots=True)
+class PageURLs(object):
+    """
+    The URLs of the published pages, by (page id, language), where the page
+    id is either the id of the public page or of its draft. URLs are
+    reversed when first asked for.
+
+    The paths of all the published pages are loaded upfront, with two
+    queries, by `for_published_pages()`. Otherwise (`complete` False), the
+    paths of each page are loaded with one query when first asked for,
+    which suits runs checking a few pages.
+    """
+    _paths = attr.ib(default=attr.Factory(dict))
+    _complete = attr.ib(default=False)
+    _urls = attr.ib(default=attr.Factory(dict), init=False)
+    _loaded_pages = attr.ib(default=attr.Factory(set), init=False)
+
+    @classmethod
+    def for_published_pages(cls):
+        public_ids = dict(
+            Page.objects.filter(publisher_is_draft=False).values_list('pk', 'publisher_public_id')
+        )
+        paths = {}
+        titles = Title.objects.filter(page__publisher_is_draft=False).values_list('page_id', 'language', 'path')
+        for page_id, language, path in titles:
+            paths[page_id, language] = path
+            draft_id = public_ids.get(page_id)
+            if draft_id is not None:
+                paths[draft_id, language] = path
+        return cls(paths, complete=True)
+
+    def load_page(self, page_id):
+        """
+        Load the paths of the published page `page_id` (public or draft),
+        and of its counterpart.
+        """
+        self._loaded_pages.add(page_id)
+        titles = Title.objects.filter(
+            Q(page_id=page_id) | Q(page__publisher_public_id=page_id),
+            page__publisher_is_draft=False,
+        ).values_list('page_id', 'page__publisher_public_id', 'language', 'path')
+        for public_id, draft_id, language, path in titles:
+            self._loaded_pages.add(public_id)
+            self._paths[public_id, language] = path
+            if draft_id is not None:
+                self._loaded_pages.add(draft_id)
+                self._paths[draft_id, language] = path
+
+    def reverse(self, path, language):
+        """
+        Return the URL of the page at `path` in `language`, as
+        `Page.get_absolute_url()` does, or None if it can't be reversed.
+        """
+        with force_language(language):
+            try:
+                if not path:
+                    return reverse('pages-root')
+                return reverse('pages-details-by-slug', kwargs={'slug': path})
+            except NoReverseMatch:
+                return None
+
+    def get_absolute_url(self, page_id, language, get_page):
+        """
+        Return the URL of the page `page_id` in `language`. Pages which are
+        not published, or not in that language, are left to their own
+        `get_absolute_url()`, `get_page` returning the page.
+        Raises NoReverseMatch like `Page.get_absolute_url()`.
+        """
+        key = page_id, language
+        try:
+            url = self._urls[key]
+        except KeyError:
+            if not self._complete and page_id not in self._loaded_pages:
+                self.load_page(page_id)
+            try:
+                path = self._paths[key]
+            except KeyError:
+                return get_page().get_absolute_url(language)
+            url = self._urls[key] = self.reverse(path, language)
+        if url is None:
+            raise NoReverseMatch('No URL for page {0} in "{1}"'.format(page_id, language))
+        return url
+
+    def get_full_url(self, page, language):
+        """
+        Return the URL of `page` in `language` on the domain of its site, or
+        an empty string if it has none.
+        """
+        try:
+            return 'https://{}{}'.format(page.site.domain, self.get_absolute_url(page.pk, language, lambda: page))
+        except NoReverseMatch:
+            return ''
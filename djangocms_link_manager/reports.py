@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import csv
+import io
+import json
+
+from tempfile import SpooledTemporaryFile
+
+from django.template.loader import get_template
+from django.utils import six
+from django.utils.encoding import force_text
+
+from cms.utils.placeholder import get_placeholder_conf
+
+import attr
+
+from .verdicts import INVALID
+
+
+@attr.s(slots=True)
+class BrokenLink(object):
+    """
+    A compact record of a broken link, holding only plain values so that
+    reports don't keep plugin instances or pages in memory.
+    """
+    cls = attr.ib()  # Plugin type
+    pk = attr.ib()
+    page = attr.ib()  # Page title
+    page_url = attr.ib()
+    slot = attr.ib()
+    label = attr.ib()
+    url = attr.ib()
+    reason = attr.ib(default=None)
+    status_code = attr.ib(default=None)
+
+    @classmethod
+    def from_link(cls, plugin, link_report, page, page_url=''):
+        """
+        Return the broken link of an invalid link report of `plugin`, on
+        `page` (or what holds its placeholder outside of pages, if any).
+        """
+        slot = plugin.placeholder.slot
+        slot_name = get_placeholder_conf('name', slot)
+        if slot_name is None:
+            slot_name = slot
+        return cls(
+            cls=plugin.plugin_type,
+            page=force_text(page) if page is not None else '',
+            page_url=page_url,
+            pk=plugin.pk,
+            slot=force_text(slot_name),
+            label=force_text(link_report.text),
+            url=link_report.url and force_text(link_report.url),
+            reason=link_report.reason or INVALID,
+            status_code=link_report.status_code,
+        )
+
+    def as_dict(self):
+        return attr.asdict(self)
+
+    def as_record(self):
+        """
+        Return the broken link as an ordered list of (field, value) pairs, as
+        serialized in machine-readable reports.
+        """
+        return list(zip(RECORD_FIELDS, [
+            self.pk, self.cls, self.page, self.page_url, self.slot,
+            self.label, self.url, self.reason, self.status_code,
+        ]))
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Return the broken link of a record of a machine-readable report.
+        """
+        record = dict(record)
+        return cls(cls=record.pop('plugin_type'), **record)
+
+
+# Fields of the records of machine-readable reports.
+RECORD_FIELDS = (
+    'pk', 'plugin_type', 'page', 'page_url', 'slot', 'label', 'url', 'reason', 'status_code',
+)
+
+# Counters of the summary of a run, which are added up when merging the
+# partial reports of a sharded run.
+SUMMARY_COUNTERS = (
+    'count_all_links', 'count_bad_links', 'count_unique_urls', 'count_url_references',
+)
+
+
+class SpooledBrokenLinks(object):
+    """
+    A sequence of broken links stored in a temporary file (kept in memory
+    while small), so that a report can be rendered from them at the end
+    without holding them all in memory.
+    """
+    max_size = 1024 * 1024
+
+    def __init__(self):
+        self._file = SpooledTemporaryFile(max_size=self.max_size)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        self._file.seek(0)
+        try:
+            for line in self._file:
+                yield BrokenLink(**json.loads(line.decode('utf-8')))
+        finally:
+            self._file.seek(0, 2)
+
+    def append(self, broken_link):
+        self._file.write(json.dumps(broken_link.as_dict()).encode('utf-8') + b'\n')
+        self._count += 1
+
+    def close(self):
+        self._file.close()
+
+
+class ReportWriter(object):
+    """
+    Writes a report to `stream` as broken links are found. Subclasses
+    override `write()`, and optionally `start()` and `finish()`, which get
+    the context of the run (options, timestamp and, when finishing, the
+    summary counters).
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def start(self, context):
+        pass
+
+    def write(self, broken_link):
+        raise NotImplementedError('Must be implemented in sub-class.')
+
+    def finish(self, context):
+        pass
+
+
+class TemplateReportWriter(ReportWriter):
+    """
+    Renders a template with the broken links (as `bad_links`) once the run is
+    finished. Broken links are spooled to a temporary file until then.
+    """
+
+    def __init__(self, stream, template_name):
+        super(TemplateReportWriter, self).__init__(stream)
+        self.template_name = template_name
+        self.broken_links = SpooledBrokenLinks()
+
+    def write(self, broken_link):
+        self.broken_links.append(broken_link)
+
+    def finish(self, context):
+        context = dict(context, bad_links=self.broken_links)
+        try:
+            self.stream.write(get_template(self.template_name).render(context))
+        finally:
+            self.broken_links.close()
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """
+    Writes one JSON object per broken link, as they are found.
+
+    Partial reports (of a shard of a run) end with a `{"summary": {...}}`
+    object holding the counters of the run, see `merge_reports()`.
+    """
+
+    def write(self, broken_link):
+        record = json.dumps(dict(broken_link.as_record()), sort_keys=True)
+        self.stream.write(record + '\n')
+
+    def finish(self, context):
+        if context.get('partial'):
+            summary = dict((name, context[name]) for name in SUMMARY_COUNTERS)
+            summary['unknown_plugin_classes'] = context['unknown_plugin_classes']
+            self.stream.write(json.dumps({'summary': summary}, sort_keys=True) + '\n')
+
+
+class CsvReportWriter(ReportWriter):
+    """
+    Writes a header, then one CSV row per broken link, as they are found.
+    """
+
+    def start(self, context):
+        self.write_row(RECORD_FIELDS)
+
+    def write(self, broken_link):
+        self.write_row([value for field, value in broken_link.as_record()])
+
+    def write_row(self, values):
+        values = ['' if value is None else six.text_type(value) for value in values]
+        if six.PY2:  # pragma: no cover
+            # The Python 2.x csv module only handles byte strings.
+            buffer = io.BytesIO()
+            csv.writer(buffer).writerow([value.encode('utf-8') for value in values])
+            row = buffer.getvalue().decode('utf-8')
+        else:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(values)
+            row = buffer.getvalue()
+        self.stream.write(row)
+
+
+# Report formats: (writer class, default template)
+REPORT_FORMATS = {
+    'text': (TemplateReportWriter, 'djangocms_link_manager/text_only.html'),
+    'html': (TemplateReportWriter, 'djangocms_link_manager/report.html'),
+    'jsonl': (JsonLinesReportWriter, None),
+    'csv': (CsvReportWriter, None),
+}
+
+
+def get_report_writer(report_format, stream, template_name=None):
+    """
+    Return the writer of the given format, writing to `stream`. Template
+    based formats use `template_name` when given.
+    """
+    writer_class, default_template_name = REPORT_FORMATS[report_format]
+    if default_template_name is None:
+        return writer_class(stream)
+    return writer_class(stream, template_name or default_template_name)
+
+
+def merge_reports(streams, writer):
+    """
+    Write the broken links of partial JSON lines reports to `writer`, in
+    order, and return their combined summary counters. Raises ValueError
+    when a report has no summary, e.g. because its run did not finish.
+
+    URLs found by several shards are counted once per shard in
+    `count_unique_urls`.
+    """
+    summary = dict((name, 0) for name in SUMMARY_COUNTERS)
+    summary['unknown_plugin_classes'] = []
+    for stream in streams:
+        partial = None
+        for line in stream:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'summary' in record:
+                partial = record['summary']
+            else:
+                writer.write(BrokenLink.from_record(record))
+        if partial is None:
+            raise ValueError('{0} is not a complete partial report'.format(getattr(stream, 'name', stream)))
+        for name in SUMMARY_COUNTERS:
+            summary[name] += partial[name]
+        for plugin_type in partial['unknown_plugin_classes']:
+            if plugin_type not in summary['unknown_plugin_classes']:
+                summary['unknown_plugin_classes'].append(plugin_type)
+    return summary
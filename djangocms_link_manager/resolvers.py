@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import posixpath
+
+try:  # pragma: no cover
+    # Python 3.x
+    from urllib.parse import unquote, urlparse
+except ImportError:  # pragma: no cover
+    # Python 2.x
+    from urllib import unquote
+    from urlparse import urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.storage import default_storage
+from django.core.urlresolvers import Resolver404, resolve
+from django.utils.translation import get_language_from_path, override
+
+from cms.models import Title
+
+import attr
+
+from .utils import normalize_url
+
+
+# Status codes given to the links resolved locally.
+FOUND = 200
+NOT_FOUND = 404
+
+# Names of the URL patterns of django CMS pages.
+CMS_PAGE_URL_NAMES = ('pages-root', 'pages-details-by-slug')
+
+
+def get_host(url):
+    return urlparse(normalize_url(url)).netloc
+
+
+def is_served_under(path, base_url):
+    """
+    Return True if `path` is under `base_url`, a path such as MEDIA_URL (and
+    not a URL to another host).
+    """
+    return bool(base_url) and base_url.startswith('/') and base_url != '/' and path.startswith(base_url)
+
+
+@attr.s(slots=True)
+class LocalResolver(object):
+    """
+    Checks the links to this site (the `netlocs` relative links are made
+    absolute with) without making HTTP requests, so that no running server
+    is needed:
+
+    * media files are looked up in the default storage, by listing each of
+      their directories once (one request per directory on remote storages,
+      or per file on the ones which can't be listed),
+    * static files with the staticfiles finders,
+    * CMS pages by their path, among the published pages of the site, with
+      one query per language,
+    * other paths with Django's URL resolver.
+
+    What is found is remembered, so a resolver should not outlive a run.
+    """
+    netlocs = attr.ib(default=('localhost:8000',))
+    _hosts = attr.ib(default=None, init=False)
+    # Names of the files of the media directories, None when not listable.
+    _media_directories = attr.ib(default=attr.Factory(dict), init=False)
+    # Whether files exist, by (root URL, path).
+    _files = attr.ib(default=attr.Factory(dict), init=False)
+    # Whether pages are published, by (language, path).
+    _pages = attr.ib(default=attr.Factory(dict), init=False)
+
+    def __attrs_post_init__(self):
+        self._hosts = frozenset(get_host('//' + netloc) for netloc in self.netlocs)
+
+    def is_local(self, url):
+        return get_host(url) in self._hosts
+
+    def get_status_codes(self, urls):
+        """
+        Return the status codes of `urls`, links to this site, in order. The
+        CMS pages are looked up with one query per language.
+        """
+        status_codes = []
+        pages = {}  # (language, path) of the pages to look up, by index
+        for index, url in enumerate(urls):
+            path = unquote(urlparse(url).path)
+            status_code = self.get_file_status_code(path)
+            if status_code is None:
+                page = self.resolve_page(path)
+                if page is None:
+                    status_code = FOUND
+                elif page is NOT_FOUND:
+                    status_code = NOT_FOUND
+                else:
+                    pages[index] = page
+            status_codes.append(status_code)
+
+        found_pages = self.get_published_pages(set(pages.values()))
+        for index, page in pages.items():
+            status_codes[index] = FOUND if page in found_pages else NOT_FOUND
+        return status_codes
+
+    def get_file_status_code(self, path):
+        """
+        Return the status code of a media or static file path, or None if the
+        path is not one of those.
+        """
+        if is_served_under(path, settings.MEDIA_URL):
+            exists = self.media_file_exists
+            base_url = settings.MEDIA_URL
+        elif is_served_under(path, settings.STATIC_URL):
+            exists = finders.find
+            base_url = settings.STATIC_URL
+        else:
+            return None
+        key = base_url, path
+        if key not in self._files:
+            self._files[key] = bool(exists(path[len(base_url):]))
+        return FOUND if self._files[key] else NOT_FOUND
+
+    def media_file_exists(self, name):
+        directory, filename = posixpath.split(name)
+        if directory not in self._media_directories:
+            try:
+                self._media_directories[directory] = frozenset(default_storage.listdir(directory)[1])
+            except NotImplementedError:
+                self._media_directories[directory] = None
+            except (IOError, OSError):
+                # The directory doesn't exist
+                self._media_directories[directory] = frozenset()
+        filenames = self._media_directories[directory]
+        if filenames is None:
+            return default_storage.exists(name)
+        return filename in filenames
+
+    def resolve_page(self, path):
+        """
+        Resolve `path` in the language of its prefix, if any. Return the
+        (language, page path) of a CMS page, None for other views, or
+        NOT_FOUND.
+        """
+        language = get_language_from_path(path) or settings.LANGUAGE_CODE
+        with override(language):
+            try:
+                match = resolve(path)
+            except Resolver404:
+                return NOT_FOUND
+        if match.url_name not in CMS_PAGE_URL_NAMES:
+            return None
+        return language, match.kwargs.get('slug', '').strip('/')
+
+    def get_published_pages(self, pages):
+        """
+        Return the set of the (language, path) pairs of `pages` which are
+        published pages of the current site.
+        """
+        paths_by_language = {}
+        for language, path in pages:
+            if (language, path) not in self._pages:
+                paths_by_language.setdefault(language, set()).add(path)
+
+        for language, paths in paths_by_language.items():
+            titles = Title.objects.filter(
+                language=language,
+                path__in=paths,
+                published=True,
+                publisher_is_draft=False,
+                page__site_id=settings.SITE_ID,
+            )
+            found = set(titles.values_list('path', flat=True))
+            self._pages.update(((language, path), path in found) for path in paths)
+        return set(page for page in pages if self._pages[page])
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+try:  # pragma: no cover
+    # Python 3.x
+    from urllib.parse import urlparse
+except ImportError:  # pragma: no cover
+    # Python 2.x
+    from urlparse import urlparse
+
+import attr
+
+from .conf import get_setting
+
+
+clock = getattr(time, 'monotonic', time.time)
+
+
+@attr.s(slots=True)
+class HostThrottle(object):
+    """
+    Spaces out the requests made to a single host by at least `interval`
+    seconds, and postpones them further when the host asks to (Retry-After).
+    """
+    interval = attr.ib(default=0)
+    max_retry_after = attr.ib(default=120)
+    _lock = attr.ib(default=attr.Factory(threading.Lock), init=False)
+    _next_request_at = attr.ib(default=0, init=False)
+
+    def wait(self):
+        """
+        Block until a request can be made to the host.
+        """
+        with self._lock:
+            current = clock()
+            request_at = max(current, self._next_request_at)
+            self._next_request_at = request_at + self.interval
+        if request_at > current:
+            time.sleep(request_at - current)
+
+    def defer(self, seconds):
+        """
+        Make no request to the host for the next `seconds` seconds. Return
+        False if the delay is longer than we are willing to wait.
+        """
+        if seconds > self.max_retry_after:
+            return False
+        with self._lock:
+            self._next_request_at = max(self._next_request_at, clock() + seconds)
+        return True
+
+
+@attr.s(slots=True)
+class HostScheduler(object):
+    """
+    Runs URL fetches grouped by host: distinct hosts are fetched in parallel
+    (up to `concurrency` at a time), while the requests to each host are
+    limited to `host_concurrency` at a time and spaced out by its throttle.
+    """
+    concurrency = attr.ib(default=1)
+    host_interval = attr.ib(default=attr.Factory(lambda: get_setting('HOST_INTERVAL')))
+    host_concurrency = attr.ib(default=attr.Factory(lambda: get_setting('HOST_CONCURRENCY')))
+    max_retry_after = attr.ib(default=attr.Factory(lambda: get_setting('MAX_RETRY_AFTER')))
+    _throttles = attr.ib(default=attr.Factory(dict), init=False)
+    _lock = attr.ib(default=attr.Factory(threading.Lock), init=False)
+
+    def get_throttle(self, host):
+        with self._lock:
+            try:
+                return self._throttles[host]
+            except KeyError:
+                throttle = self._throttles[host] = HostThrottle(
+                    interval=self.host_interval, max_retry_after=self.max_retry_after)
+                return throttle
+
+    def get_lanes(self, urls):
+        """
+        Split the URLs into lanes of (index, url) pairs to be fetched one
+        after the other. Each host gets up to `host_concurrency` lanes, and
+        the lanes of distinct hosts are interleaved, busiest hosts first.
+        """
+        hosts = OrderedDict()
+        for index, url in enumerate(urls):
+            hosts.setdefault(urlparse(url).netloc.lower(), []).append((index, url))
+
+        host_lanes = []
+        for host, items in sorted(hosts.items(), key=lambda item: -len(item[1])):
+            count = max(1, min(self.host_concurrency, len(items)))
+            host_lanes.append([(host, items[offset::count]) for offset in range(count)])
+
+        lanes = []
+        for depth in range(max(len(item) for item in host_lanes) if host_lanes else 0):
+            lanes.extend(item[depth] for item in host_lanes if depth < len(item))
+        return lanes
+
+    def run(self, fetch, urls):
+        """
+        Return the results of `fetch(url, throttle)` for each of `urls`, in
+        the same order.
+        """
+        results = [None] * len(urls)
+
+        def run_lane(lane):
+            host, items = lane
+            throttle = self.get_throttle(host)
+            for index, url in items:
+                results[index] = fetch(url, throttle)
+
+        lanes = self.get_lanes(urls)
+        if self.concurrency > 1 and len(lanes) > 1:
+            pool = ThreadPool(min(self.concurrency, len(lanes)))
+            try:
+                pool.map(run_lane, lanes, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for lane in lanes:
+                run_lane(lane)
+        return results
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+
+import attr
+
+from .models import LinkVerdict, get_url_hash
+
+
+# Number of URLs whose verdicts are read or stored with the same queries.
+BATCH_SIZE = 500
+
+
+@attr.s(slots=True)
+class VerdictStore(object):
+    """
+    Persists the status codes of verified URLs across runs, in LinkVerdict.
+    When `refresh` is set, stored verdicts are ignored (but still updated).
+    """
+    refresh = attr.ib(default=False)
+
+    def get_status_codes(self, urls):
+        """
+        Return a dict of the stored, non-expired status codes of `urls`.
+        """
+        if self.refresh:
+            return {}
+        urls = list(urls)
+        status_codes = {}
+        for start in range(0, len(urls), BATCH_SIZE):
+            status_codes.update(
+                (verdict.url, verdict.status_code)
+                for verdict in LinkVerdict.objects.for_urls(urls[start:start + BATCH_SIZE])
+                if verdict.is_fresh()
+            )
+        return status_codes
+
+    def save_status_codes(self, status_codes):
+        """
+        Store the status codes of a dict of URLs to status codes, with a few
+        queries per batch of URLs: one to find the stored ones, one to
+        create the others and one update per distinct status code.
+        """
+        checked_at = now()
+        urls_by_hash = dict((get_url_hash(url), url) for url in status_codes)
+        hashes = list(urls_by_hash)
+        for start in range(0, len(hashes), BATCH_SIZE):
+            batch = dict((url_hash, urls_by_hash[url_hash]) for url_hash in hashes[start:start + BATCH_SIZE])
+            self._save_batch(batch, status_codes, checked_at)
+
+    def _save_batch(self, urls_by_hash, status_codes, checked_at):
+        stored_hashes = set(
+            LinkVerdict.objects.filter(url_hash__in=list(urls_by_hash)).values_list('url_hash', flat=True))
+        new_verdicts = [
+            LinkVerdict(
+                url_hash=url_hash,
+                url=url,
+                status_code=status_codes[url],
+                checked_at=checked_at,
+                ttl=LinkVerdict.get_ttl(status_codes[url]),
+            )
+            for url_hash, url in urls_by_hash.items() if url_hash not in stored_hashes
+        ]
+        try:
+            with transaction.atomic():
+                LinkVerdict.objects.bulk_create(new_verdicts)
+        except IntegrityError:
+            # Some were stored meanwhile by a concurrent run (e.g. another
+            # shard); store them one by one.
+            stored_hashes = set(urls_by_hash)
+
+        hashes_by_status = {}
+        for url_hash in stored_hashes:
+            hashes_by_status.setdefault(status_codes[urls_by_hash[url_hash]], []).append(url_hash)
+        for status_code, hashes in hashes_by_status.items():
+            updated = LinkVerdict.objects.filter(url_hash__in=hashes).update(
+                status_code=status_code,
+                checked_at=checked_at,
+                ttl=LinkVerdict.get_ttl(status_code),
+            )
+            if updated < len(hashes):
+                for url_hash in hashes:
+                    LinkVerdict.objects.get_or_create(url_hash=url_hash, defaults={
+                        'url': urls_by_hash[url_hash],
+                        'status_code': status_code,
+                        'checked_at': checked_at,
+                        'ttl': LinkVerdict.get_ttl(status_code),
+                    })
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test.testcases import TestCase
+
+from ..bitcoin import check_address
+
+
+class BitcoinTests(TestCase):
+
+    def test_base58_address(self):
+        self.assertTrue(check_address('1AGNa15ZQXAZUgFiqJ2i7Z2DPU2J6hW62i'))
+        self.assertFalse(check_address('1AGNa15ZQXAZUgFiqJ2i7Z2DPU2J6hW6XX'))  # Bad checksum
+        self.assertFalse(check_address('1AGNa15ZQXAZUgFiqJ2i7Z2DPU2J6hW62I'))  # Not a base58 digit
+        self.assertFalse(check_address('1AGNa15ZQXAZUgFiqJ2i7Z2DPU2J6hW62i1AGNa15ZQX'))  # Too long
+
+    def test_segwit_address(self):
+        # bech32, witness version 0
+        self.assertTrue(check_address('bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq'))
+        self.assertTrue(check_address('BC1QAR0SRRR7XFKVY5L643LYDNW9RE59GTZZWF5MDQ'))
+        self.assertFalse(check_address('bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdd'))  # Bad checksum
+        self.assertFalse(check_address('bc1qar0srrr7xfkvy5l643lydnw9re59GTZZWF5MDQ'))  # Mixed case
+        # bech32m, witness version 1 (taproot)
+        self.assertTrue(check_address('bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0'))
+        self.assertFalse(check_address('bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj1'))
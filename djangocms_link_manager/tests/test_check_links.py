@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import io
+import json
+
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import six
+from django.utils.timezone import now
+
+from cms.api import add_plugin, create_page
+from cms.constants import TEMPLATE_INHERITANCE_MAGIC
+from cms.models import Page, Placeholder
+from cms.plugin_base import CMSPluginBase
+from cms.plugin_pool import plugin_pool
+from cms.utils import get_cms_setting
+from cms.utils.placeholder import get_placeholders
+
+from ..link_manager import LinkManager, LinkReport
+from ..link_manager_pool import link_manager_pool
+from ..management.commands.check_links import Command, run_shard
+from ..models import LinkCheckResult, LinkCheckRun
+
+
+class FakeLinkPlugin(CMSPluginBase):
+    name = 'Fake link'
+    render_plugin = False
+
+
+class FakeManager(LinkManager):
+
+    def check_link(self, instance, verify_exists=False):
+        url = 'http://example.com/{0}/'.format(instance.pk)
+        return LinkReport(valid=instance.position != 1, text='Link', url=url)
+
+
+class BrokenLinkManager(LinkManager):
+
+    def check_link(self, instance, verify_exists=False):
+        return LinkReport(valid=False, text='Link', url='http://example.com/{0}/'.format(instance.pk))
+
+
+class SerialCommand(Command):
+
+    def run_shards(self, shards, workers):
+        # In this process, so that the shards see the data of the test.
+        for shard_options in shards:
+            run_shard(shard_options)
+
+
+class CheckLinksTestCase(TestCase):
+    link_manager = FakeManager
+
+    def setUp(self):
+        super(CheckLinksTestCase, self).setUp()
+        plugin_pool.register_plugin(FakeLinkPlugin)
+        self.addCleanup(plugin_pool.unregister_plugin, FakeLinkPlugin)
+        link_manager_pool.register('FakeLinkPlugin', self.link_manager)
+        self.addCleanup(link_manager_pool.unregister, 'FakeLinkPlugin')
+        self.template = get_cms_setting('TEMPLATES')[0][0]
+        self.slot = get_placeholders(self.template)[0].slot
+
+    def create_link_plugins(self, title, count=2):
+        """
+        Create a published page with `count` link plugins on its public
+        version, and return them.
+        """
+        page = create_page(title, self.template, 'en', published=True)
+        public_page = Page.objects.get(pk=page.pk).get_public_object()
+        placeholder = public_page.placeholders.get_or_create(slot=self.slot)[0]
+        return [add_plugin(placeholder, FakeLinkPlugin, 'en') for i in range(count)]
+
+    def check_links(self, command='check_links', **options):
+        """
+        Run check_links (or the given command instance) and return its output.
+        """
+        stdout = six.StringIO()
+        call_command(command, stdout=stdout, stderr=six.StringIO(), **options)
+        return stdout.getvalue()
+
+
+class QueriesTests(CheckLinksTestCase):
+
+    def test_queries_dont_depend_on_pages(self):
+        self.create_link_plugins('Page 1')
+        self.check_links()
+        # The second run also replaces stored results, as the next ones.
+        with CaptureQueriesContext(connection) as queries:
+            self.check_links()
+        self.assertGreater(len(queries), 0)
+
+        for index in range(2, 6):
+            self.create_link_plugins('Page {}'.format(index))
+        self.check_links()
+
+        with self.assertNumQueries(len(queries)):
+            output = self.check_links()
+        self.assertIn('Will check 10 Plugins', output)
+
+
+class IncrementalTests(CheckLinksTestCase):
+
+    def setUp(self):
+        super(IncrementalTests, self).setUp()
+        self.plugins = self.create_link_plugins('Page 1') + self.create_link_plugins('Page 2')
+
+    def get_last_run(self):
+        return LinkCheckRun.objects.order_by('-started_at').first()
+
+    def test_first_run(self):
+        output = self.check_links(incremental=True)
+
+        self.assertIn('Will check 4 Plugins', output)
+        self.assertFalse(self.get_last_run().incremental)
+
+    def test_changed_plugins(self):
+        self.check_links()
+        self.plugins[0].save()
+
+        output = self.check_links(incremental=True)
+
+        self.assertIn('Will check 1 Plugins', output)
+        self.assertTrue(self.get_last_run().incremental)
+        # The results of the unchanged plugins are kept
+        self.assertEqual(LinkCheckResult.objects.count(), 4)
+
+    def test_full_sweep(self):
+        self.check_links()
+        self.assertIn('Will check 0 Plugins', self.check_links(incremental=True))
+        LinkCheckRun.objects.filter(incremental=False).update(started_at=now() - timedelta(days=8))
+
+        output = self.check_links(incremental=True)
+
+        self.assertIn('Will check 4 Plugins', output)
+        self.assertFalse(self.get_last_run().incremental)
+
+
+class ShardTests(CheckLinksTestCase):
+    link_manager = BrokenLinkManager
+
+    def test_shards(self):
+        plugins = []
+        for index in range(1, 4):
+            plugins.extend(self.create_link_plugins('Page {}'.format(index), count=3))
+
+        shards = []
+        for index in range(1, 4):
+            output = self.check_links(shard='{}/3'.format(index), format='jsonl')
+            records = [json.loads(line) for line in output.splitlines()]
+            shards.append([record['pk'] for record in records if 'pk' in record])
+
+        # Every plugin is checked by exactly one shard
+        self.assertEqual(sorted(sum(shards, [])), sorted(plugin.pk for plugin in plugins))
+        self.assertTrue(all(shards))
+
+    def test_workers(self):
+        plugins = []
+        for index in range(1, 4):
+            plugins.extend(self.create_link_plugins('Page {}'.format(index), count=3))
+
+        output = self.check_links(SerialCommand(), workers=2, format='jsonl')
+
+        # The reports of the shards are merged
+        records = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(sorted(record['pk'] for record in records), sorted(plugin.pk for plugin in plugins))
+
+    def test_shard_requires_jsonl(self):
+        with self.assertRaises(CommandError):
+            self.check_links(shard='1/3', format='csv')
+
+
+class GhostPlaceholdersTests(TestCase):
+
+    def test_inheriting_page(self):
+        template = get_cms_setting('TEMPLATES')[0][0]
+        parent = create_page('Parent', template, 'en', published=True)
+        child = create_page('Child', TEMPLATE_INHERITANCE_MAGIC, 'en', parent=parent, published=True)
+        content = Placeholder.objects.create(slot='content')
+        ghost = Placeholder.objects.create(slot='ghost')
+        Page.objects.get(pk=child.pk).get_public_object().placeholders.add(content, ghost)
+
+        command = Command()
+        command.log_stream = io.StringIO()
+        # The child inherits the slots of its parent's template
+        command._template_slots = {template: frozenset(['content'])}
+        ghosts = command.get_ghost_placeholders()
+
+        self.assertIn(ghost, ghosts)
+        self.assertNotIn(content, ghosts)
+
+
+class LinkManagersTests(TestCase):
+
+    def setUp(self):
+        link_manager_pool.register('TestPlugin', LinkManager(scheme='https', netloc='www.example.com'))
+        self.addCleanup(link_manager_pool.unregister, 'TestPlugin')
+        self.command = Command()
+        self.command.verifier = None
+        self.command.page_urls = None
+
+    def test_configured_link_manager(self):
+        link_manager = self.command.get_link_managers({'scheme': None, 'netloc': None})['TestPlugin']
+
+        self.assertEqual(link_manager.scheme, 'https')
+        self.assertEqual(link_manager.netloc, 'www.example.com')
+
+    def test_explicit_host(self):
+        link_manager = self.command.get_link_managers({'scheme': None, 'netloc': 'localhost:8080'})['TestPlugin']
+
+        self.assertEqual(link_manager.scheme, 'https')
+        self.assertEqual(link_manager.netloc, 'localhost:8080')
+
+    def test_local_netlocs(self):
+        self.assertIn('www.example.com', self.command.get_local_netlocs({'netloc': None}))
+        self.assertEqual(self.command.get_local_netlocs({'netloc': 'localhost:8080'}), ['localhost:8080'])
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test.testcases import TestCase
+
+from cms.models import CMSPlugin, Placeholder
+
+from ..checks import check_plugins, plugin_deleted
+from ..link_manager import LinkManager, LinkReport
+from ..link_manager_pool import link_manager_pool
+from ..models import LinkCheckResult, LinkReference
+
+
+class FakeManager(LinkManager):
+
+    def check_link(self, instance, verify_exists=False):
+        url = 'http://example.com/{0}/'.format(instance.position)
+        return LinkReport(valid=instance.position != 1, text='Link', url=url)
+
+
+class FailingManager(LinkManager):
+
+    def check_link(self, instance, verify_exists=False):
+        if instance.position == 1:
+            raise AttributeError('file_link')
+        return FakeManager().check_link(instance, verify_exists)
+
+
+class CheckPluginsTests(TestCase):
+
+    def setUp(self):
+        super(CheckPluginsTests, self).setUp()
+        placeholder = Placeholder.objects.create(slot='content')
+        self.plugins = [
+            CMSPlugin.objects.create(placeholder=placeholder, plugin_type='FakeLinkPlugin', language='en', position=0),
+            CMSPlugin.objects.create(placeholder=placeholder, plugin_type='FakeLinkPlugin', language='en', position=1),
+        ]
+        link_manager_pool.register('FakeLinkPlugin', FakeManager)
+        self.addCleanup(link_manager_pool.unregister, 'FakeLinkPlugin')
+
+    def test_check_plugins(self):
+        check_plugins(self.plugins)
+        check_plugins(self.plugins)
+
+        results = LinkCheckResult.objects.order_by('plugin_id')
+        self.assertEqual([(result.plugin_id, result.valid) for result in results],
+                         [(self.plugins[0].pk, True), (self.plugins[1].pk, False)])
+        self.assertFalse(results[1].verify_exists)
+        self.assertEqual(results[1].url, 'http://example.com/1/')
+        self.assertEqual(results[1].label, 'Link')
+
+    def test_failing_link_manager(self):
+        link_manager_pool.register('FakeLinkPlugin', FailingManager)
+
+        # The error is logged, and the other plugins are checked
+        check_plugins(self.plugins)
+
+        self.assertEqual(list(LinkCheckResult.objects.values_list('plugin_id', flat=True)), [self.plugins[0].pk])
+
+    def test_link_references(self):
+        check_plugins(self.plugins)
+
+        self.assertEqual(LinkReference.objects.for_host('EXAMPLE.com').count(), 2)
+        self.assertEqual(LinkReference.objects.for_host('www.example.com').count(), 0)
+        reference = LinkReference.objects.for_url('http://Example.com:80/1/#top').get()
+        self.assertEqual(reference.plugin_id, self.plugins[1].pk)
+        self.assertEqual((reference.language, reference.slot, reference.page_id), ('en', 'content', None))
+
+    def test_plugin_deleted(self):
+        check_plugins(self.plugins)
+        plugin_deleted(CMSPlugin, self.plugins[1])
+
+        self.assertEqual(list(LinkCheckResult.objects.values_list('plugin_id', flat=True)), [self.plugins[0].pk])
+        self.assertEqual(list(LinkReference.objects.values_list('plugin_id', flat=True)), [self.plugins[0].pk])
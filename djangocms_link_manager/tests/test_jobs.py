@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.test.testcases import TestCase
+from django.utils.timezone import now
+
+from ..models import AnalysisJob
+
+
+class AnalysisJobTests(TestCase):
+
+    def test_enqueue_coalesces_pending_jobs(self):
+        job = AnalysisJob.objects.enqueue(page_id=1, verify_exists=True)
+        self.assertEqual(AnalysisJob.objects.enqueue(page_id=1, verify_exists=True), job)
+        self.assertNotEqual(AnalysisJob.objects.enqueue(page_id=1, verify_exists=False), job)
+        self.assertNotEqual(AnalysisJob.objects.enqueue(page_id=2, verify_exists=True), job)
+        self.assertNotEqual(AnalysisJob.objects.enqueue(page_id=1, verify_exists=True, host='example.com'), job)
+
+        job.finish(AnalysisJob.DONE)
+        self.assertNotEqual(AnalysisJob.objects.enqueue(page_id=1, verify_exists=True), job)
+
+    def test_claim_next(self):
+        first = AnalysisJob.objects.enqueue(page_id=1)
+        second = AnalysisJob.objects.enqueue(page_id=2)
+
+        self.assertEqual(AnalysisJob.objects.claim_next(), first)
+        self.assertEqual(AnalysisJob.objects.get(pk=first.pk).status, AnalysisJob.RUNNING)
+        self.assertEqual(AnalysisJob.objects.claim_next(), second)
+        self.assertIsNone(AnalysisJob.objects.claim_next())
+
+    def test_append_output(self):
+        job = AnalysisJob.objects.enqueue()
+        job.append_output('Start link check...\n')
+        job.append_output('Done\n')
+        self.assertEqual(AnalysisJob.objects.get(pk=job.pk).output, 'Start link check...\nDone\n')
+
+    def kill_worker(self, job):
+        """
+        Make `job` look like its worker died an hour ago.
+        """
+        AnalysisJob.objects.filter(pk=job.pk).update(heartbeat_at=now() - timedelta(hours=1))
+
+    def test_stale_jobs(self):
+        job = AnalysisJob.objects.enqueue(page_id=1)
+        self.assertEqual(AnalysisJob.objects.claim_next(), job)
+        self.assertFalse(AnalysisJob.objects.stale().exists())
+
+        self.kill_worker(job)
+        self.assertEqual(list(AnalysisJob.objects.stale()), [job])
+        self.assertNotIn(job, AnalysisJob.objects.pending())
+
+        self.assertEqual(AnalysisJob.objects.fail_stale(), 1)
+        job = AnalysisJob.objects.get(pk=job.pk)
+        self.assertEqual(job.status, AnalysisJob.FAILED)
+        self.assertIn('interrupted', job.output)
+
+    def test_enqueue_replaces_stale_job(self):
+        job = AnalysisJob.objects.enqueue(page_id=1)
+        self.assertEqual(AnalysisJob.objects.claim_next(), job)
+        self.kill_worker(job)
+
+        new_job = AnalysisJob.objects.enqueue(page_id=1)
+
+        self.assertNotEqual(new_job, job)
+        self.assertEqual(new_job.status, AnalysisJob.QUEUED)
+        job = AnalysisJob.objects.get(pk=job.pk)
+        self.assertEqual(job.status, AnalysisJob.FAILED)
+        self.assertIsNone(job.pending_key)
@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 
 from django.test.testcases import TestCase
 
-from ..link_manager import LinkManager
+from ..link_manager import LinkManager, LinkReport, _check_phone_number, check_phone_number
 
 
 class LinkManagerTests(TestCase):
@@ -56,3 +56,51 @@ class LinkManagerTests(TestCase):
 
         # Invalid scheme
         self.assertFalse(self.link_manager.validate_url('gopher:192.168.0.1'))  # Unhandled scheme (for now)
+
+    def test_scheme_validators(self):
+        class GopherLinkManager(LinkManager):
+            def validate_gopher(self, parts, verify_exists=False):
+                return parts['netloc'] == 'gopher.example.com' and parts.path == '/menu'
+
+        link_manager = GopherLinkManager()
+        self.assertTrue(link_manager.validate_url('gopher://gopher.example.com/menu'))
+        self.assertFalse(link_manager.validate_url('gopher://gopher.example.com/other'))
+        # The dispatch table of each class is its own
+        self.assertIn('gopher', GopherLinkManager.get_scheme_validators())
+        self.assertNotIn('gopher', LinkManager.get_scheme_validators())
+        self.assertNotIn('url', LinkManager.get_scheme_validators())
+
+    def test_validators_compatibility(self):
+        class LegacyLinkManager(LinkManager):
+            def validate_gopher(self, parts, verify_exists=False):
+                # Validators used to be given a mutable dict
+                parts['scheme'] = 'http'
+                return self.validate_default(parts, verify_exists=verify_exists)
+
+        self.assertTrue(LegacyLinkManager().validate_url('gopher://gopher.example.com/menu'))
+        # And mailto and tel validators a string
+        self.assertTrue(self.link_manager.validate_mailto('user@example.com'))
+        self.assertTrue(self.link_manager.validate_tel('+41 44 480 12 70'))
+
+    def test_batch_validation(self):
+        verdicts = self.link_manager.validate_urls(
+            ['http://www.google.com', 'gopher:192.168.0.1', '', 'http://www.google.com'])
+        self.assertEqual([bool(verdict) for verdict in verdicts], [True, False, False, True])
+
+        class TextLinkManager(LinkManager):
+            def check_link(self, instance, verify_exists=False):
+                if instance is None:
+                    return []
+                return LinkReport(valid=self.validate_url(instance), text=instance, url=instance)
+
+        link_reports = TextLinkManager().check_links(['http://www.google.com', None, 'mailto:user@host'])
+        self.assertEqual([[bool(report.valid) for report in reports] for reports in link_reports],
+                         [[True], [], [False]])
+
+    def test_check_phone_number(self):
+        _check_phone_number.cache_clear()
+        self.assertTrue(check_phone_number('+41 44 480 12 70', 'CH'))
+        self.assertTrue(check_phone_number('+41-44-480-12-70', 'CH'))
+        self.assertFalse(check_phone_number('+1201693484', 'US'))
+        # Numbers differing only by their separators are parsed once
+        self.assertEqual(_check_phone_number.cache_info().hits, 1)
@@ -5,7 +5,8 @@ from __future__ import unicode_literals
 from django.test.testcases import TestCase
 
 from ..link_manager import LinkManager
-from ..link_manager_pool import link_manager_pool
+from ..link_manager_pool import LinkManagerPool
+from ..verifier import LinkVerifier
 
 
 class LinkManagerPoolTests(TestCase):
@@ -14,9 +15,33 @@ class LinkManagerPoolTests(TestCase):
         class FakeManager(LinkManager):
             pass
 
-        link_manager_pool.clear_pool()
+        link_manager_pool = LinkManagerPool()
         link_manager_pool.register('TestPlugin', FakeManager)
 
         self.assertTrue(len(link_manager_pool._managers) == 1)
         self.assertTrue('TestPlugin' in link_manager_pool.get_link_plugin_types())
-        self.assertTrue(link_manager_pool.get_link_manager('TestPlugin') == FakeManager)
+        self.assertIsInstance(link_manager_pool.get_link_manager('TestPlugin'), FakeManager)
+
+        link_manager_pool.unregister('TestPlugin')
+        self.assertIsNone(link_manager_pool.get_link_manager('TestPlugin'))
+
+    def test_configure(self):
+        class OfflineManager(LinkManager):
+            offline_only = True
+
+        link_manager = OfflineManager(scheme='https')
+        link_manager_pool = LinkManagerPool()
+        link_manager_pool.register('TestPlugin', link_manager)
+        link_manager_pool.register('OtherTestPlugin', link_manager)
+        verifier = LinkVerifier()
+
+        link_managers = link_manager_pool.configure(netloc='example.com', verifier=verifier)
+
+        self.assertIs(link_managers['TestPlugin'], link_managers['OtherTestPlugin'])
+        self.assertIsInstance(link_managers['TestPlugin'], OfflineManager)
+        self.assertTrue(link_managers['TestPlugin'].offline_only)
+        self.assertEqual(link_managers['TestPlugin'].scheme, 'https')
+        self.assertEqual(link_managers['TestPlugin'].netloc, 'example.com')
+        self.assertIs(link_managers['TestPlugin'].verifier, verifier)
+        # The registered manager is left alone
+        self.assertIsNone(link_manager.verifier)
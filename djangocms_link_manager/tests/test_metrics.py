@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cms.models import Page
+
+from ..metrics import Metrics
+
+
+class MetricsTests(TestCase):
+
+    def test_phases(self):
+        metrics = Metrics()
+        with metrics.measure():
+            with metrics.phase('outer'):
+                list(Page.objects.all())
+                with metrics.phase('inner'):
+                    list(Page.objects.all())
+                    list(Page.objects.all())
+        self.assertEqual(metrics.queries.count, 3)
+        # Inner phases are not counted in the outer ones
+        self.assertEqual(metrics.phases['outer']['queries'], 1)
+        self.assertEqual(metrics.phases['inner']['queries'], 2)
+        self.assertLessEqual(metrics.phases['inner']['seconds'], metrics.duration)
+
+    def test_queries_are_still_logged(self):
+        metrics = Metrics()
+        with CaptureQueriesContext(connection) as queries:
+            with metrics.measure():
+                list(Page.objects.all())
+                list(Page.objects.all())
+        self.assertEqual(metrics.queries.count, 2)
+        self.assertEqual(len(queries), 2)
+
+    def test_requests(self):
+        metrics = Metrics()
+        metrics.record_request('http://example.com/a/', 0.05, 200)
+        metrics.record_request('http://example.com/b/', 30)
+        metrics.counters.update({'store_hits': 3, 'store_misses': 1})
+
+        other = Metrics()
+        other.record_request('http://example.com/c/', 0.3, 404)
+        metrics.update(other.as_dict())
+
+        data = metrics.as_dict()
+        self.assertEqual(data['hosts']['example.com']['requests'], 3)
+        self.assertEqual(data['hosts']['example.com']['errors'], 1)
+        self.assertEqual(data['hosts']['example.com']['latency'], [1, 0, 1, 0, 0, 0, 0, 1])
+        self.assertEqual(data['store_hit_rate'], 0.75)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.test.testcases import TestCase
+from django.utils.timezone import now
+
+from ..management.commands.check_links import keyset_chunks
+from ..models import LinkCheckRun
+
+
+class LinkCheckRunTests(TestCase):
+
+    def test_get_resumable(self):
+        self.assertIsNone(LinkCheckRun.objects.get_resumable())
+
+        started_at = now() - timedelta(hours=2)
+        LinkCheckRun.objects.create(started_at=started_at, finished_at=started_at + timedelta(minutes=30))
+        self.assertIsNone(LinkCheckRun.objects.get_resumable())
+
+        run = LinkCheckRun.objects.create(started_at=started_at + timedelta(hours=1), last_plugin_id=42)
+        self.assertEqual(LinkCheckRun.objects.get_resumable(), run)
+        # A run which didn't verify that links exist isn't resumed by one which does
+        self.assertIsNone(LinkCheckRun.objects.get_resumable(verify_exists=True))
+
+        # Nor is a run interrupted before the last one
+        LinkCheckRun.objects.create(started_at=now(), finished_at=now())
+        self.assertIsNone(LinkCheckRun.objects.get_resumable())
+
+    def test_keyset_chunks(self):
+        pks = [LinkCheckRun.objects.create(started_at=now()).pk for index in range(5)]
+
+        chunks = list(keyset_chunks(LinkCheckRun.objects.values_list('pk', 'incremental'), 2))
+
+        self.assertEqual([[pk for pk, incremental in chunk] for chunk in chunks], [pks[:2], pks[2:4], pks[4:]])
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test.testcases import TestCase
+
+from cms.api import create_page
+from cms.utils import get_cms_setting
+
+from ..page_urls import PageURLs
+
+
+class PageURLsTests(TestCase):
+
+    def setUp(self):
+        super(PageURLsTests, self).setUp()
+        template = get_cms_setting('TEMPLATES')[0][0]
+        self.home = create_page('Home', template, 'en', published=True)
+        self.page = create_page('About', template, 'en', parent=self.home, published=True)
+        self.draft_only = create_page('Draft', template, 'en', parent=self.home)
+
+    def test_get_absolute_url(self):
+        page_urls = PageURLs.for_published_pages()
+        public_page = self.page.get_public_object()
+        draft_url = self.page.get_absolute_url('en')
+        public_url = public_page.get_absolute_url('en')
+        with self.assertNumQueries(0):
+            # Both the draft and the public page are known
+            self.assertEqual(page_urls.get_absolute_url(self.page.pk, 'en', None), draft_url)
+            self.assertEqual(page_urls.get_absolute_url(public_page.pk, 'en', None), public_url)
+
+        # Unpublished pages are left to Page.get_absolute_url()
+        self.assertEqual(page_urls.get_absolute_url(self.draft_only.pk, 'en', lambda: self.draft_only),
+                         self.draft_only.get_absolute_url('en'))
+
+    def test_load_pages_lazily(self):
+        page_urls = PageURLs()
+        public_page = self.page.get_public_object()
+        url = self.page.get_absolute_url('en')
+        with self.assertNumQueries(1):
+            self.assertEqual(page_urls.get_absolute_url(self.page.pk, 'en', None), url)
+            # The public page was loaded along
+            self.assertEqual(page_urls.get_absolute_url(public_page.pk, 'en', None), url)
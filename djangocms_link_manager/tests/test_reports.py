@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+
+from io import StringIO
+
+from django.test.testcases import TestCase
+
+from ..reports import BrokenLink, SpooledBrokenLinks, get_report_writer, merge_reports
+
+
+class SpooledBrokenLinksTests(TestCase):
+
+    def test_spooled_broken_links(self):
+        broken_links = SpooledBrokenLinks()
+        first = BrokenLink(cls='LinkPlugin', pk=1, page='Home', page_url='https://example.com/',
+                           slot='Content', label='Ünïcode', url='http://example.invalid/')
+        second = BrokenLink(cls='LinkPlugin', pk=2, page='Home', page_url='https://example.com/',
+                            slot='Content', label='Nothing', url=None)
+        broken_links.append(first)
+        self.assertEqual(list(broken_links), [first])
+
+        # Appending after iterating
+        broken_links.append(second)
+        self.assertEqual(len(broken_links), 2)
+        self.assertEqual(list(broken_links), [first, second])
+        broken_links.close()
+
+
+class ReportWriterTests(TestCase):
+
+    def setUp(self):
+        super(ReportWriterTests, self).setUp()
+        self.broken_link = BrokenLink(
+            cls='LinkPlugin', pk=1, page='Home', page_url='https://example.com/', slot='Content',
+            label='Partner, "Inc."', url='http://example.com/missing/', reason='http-error', status_code=404)
+
+    def test_jsonl(self):
+        stream = StringIO()
+        writer = get_report_writer('jsonl', stream)
+        writer.start({})
+        writer.write(self.broken_link)
+        writer.finish({})
+        self.assertEqual(json.loads(stream.getvalue()), {
+            'pk': 1,
+            'plugin_type': 'LinkPlugin',
+            'page': 'Home',
+            'page_url': 'https://example.com/',
+            'slot': 'Content',
+            'label': 'Partner, "Inc."',
+            'url': 'http://example.com/missing/',
+            'reason': 'http-error',
+            'status_code': 404,
+        })
+
+    def test_csv(self):
+        stream = StringIO()
+        writer = get_report_writer('csv', stream)
+        writer.start({})
+        writer.write(self.broken_link)
+        writer.finish({})
+        self.assertEqual(stream.getvalue().splitlines(), [
+            'pk,plugin_type,page,page_url,slot,label,url,reason,status_code',
+            '1,LinkPlugin,Home,https://example.com/,Content,"Partner, ""Inc.""",'
+            'http://example.com/missing/,http-error,404',
+        ])
+
+    def test_merge_partial_reports(self):
+        streams = []
+        for pk, unknown_plugin_classes in ((1, ['OldPlugin']), (2, ['OldPlugin', 'GonePlugin'])):
+            stream = StringIO()
+            writer = get_report_writer('jsonl', stream)
+            writer.write(BrokenLink(cls='LinkPlugin', pk=pk, page='Home', page_url='https://example.com/',
+                                    slot='Content', label='Link', url='http://example.invalid/'))
+            writer.finish({
+                'partial': True, 'count_all_links': 10, 'count_bad_links': 1, 'count_unique_urls': 5,
+                'count_url_references': 9, 'unknown_plugin_classes': unknown_plugin_classes,
+            })
+            stream.seek(0)
+            streams.append(stream)
+
+        merged = StringIO()
+        summary = merge_reports(streams, get_report_writer('jsonl', merged))
+        self.assertEqual([json.loads(line)['pk'] for line in merged.getvalue().splitlines()], [1, 2])
+        self.assertEqual(summary, {
+            'count_all_links': 20, 'count_bad_links': 2, 'count_unique_urls': 10,
+            'count_url_references': 18, 'unknown_plugin_classes': ['OldPlugin', 'GonePlugin'],
+        })
+
+        # A report without its summary is incomplete
+        with self.assertRaises(ValueError):
+            merge_reports([StringIO(merged.getvalue())], get_report_writer('jsonl', StringIO()))
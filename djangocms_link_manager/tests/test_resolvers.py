@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test.testcases import TestCase
+
+from ..resolvers import FOUND, NOT_FOUND, LocalResolver
+
+
+class LocalResolverTests(TestCase):
+
+    def setUp(self):
+        super(LocalResolverTests, self).setUp()
+        self.resolver = LocalResolver(netlocs=['example.com', 'localhost:8000'])
+        self.name = default_storage.save('link-manager-test.txt', ContentFile(b'test'))
+
+    def tearDown(self):
+        default_storage.delete(self.name)
+        super(LocalResolverTests, self).tearDown()
+
+    def test_is_local(self):
+        self.assertTrue(self.resolver.is_local('http://example.com/page/'))
+        self.assertTrue(self.resolver.is_local('https://EXAMPLE.com:443/page/'))
+        self.assertTrue(self.resolver.is_local('http://localhost:8000/page/'))
+        self.assertFalse(self.resolver.is_local('http://www.example.com/page/'))
+
+    def test_get_status_codes(self):
+        self.assertEqual(self.resolver.get_status_codes([
+            'http://example.com{0}{1}'.format(settings.MEDIA_URL, self.name),
+            'http://example.com{0}missing-file.txt'.format(settings.MEDIA_URL),
+            'http://example.com/{0}/no-such-page/'.format(settings.LANGUAGE_CODE),
+        ]), [FOUND, NOT_FOUND, NOT_FOUND])
+
+    def test_results_are_remembered(self):
+        urls = [
+            'http://example.com{0}{1}'.format(settings.MEDIA_URL, self.name),
+            'http://example.com/{0}/no-such-page/'.format(settings.LANGUAGE_CODE),
+        ]
+        self.resolver.get_status_codes(urls)
+        default_storage.delete(self.name)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolver.get_status_codes(urls), [FOUND, NOT_FOUND])
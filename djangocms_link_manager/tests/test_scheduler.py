@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test.testcases import TestCase
+
+from ..scheduler import HostScheduler, HostThrottle
+
+
+class HostSchedulerTests(TestCase):
+
+    def test_get_lanes(self):
+        scheduler = HostScheduler(host_concurrency=2)
+        lanes = scheduler.get_lanes([
+            'http://a.com/1', 'http://b.com/1', 'http://a.com/2', 'http://a.com/3', 'http://c.com/1',
+        ])
+        self.assertEqual(lanes, [
+            ('a.com', [(0, 'http://a.com/1'), (3, 'http://a.com/3')]),
+            ('b.com', [(1, 'http://b.com/1')]),
+            ('c.com', [(4, 'http://c.com/1')]),
+            ('a.com', [(2, 'http://a.com/2')]),
+        ])
+
+    def test_run(self):
+        scheduler = HostScheduler(concurrency=3, host_interval=0, host_concurrency=1)
+        urls = ['http://a.com/{0}'.format(i) for i in range(5)] + ['http://b.com/{0}'.format(i) for i in range(5)]
+        throttles = {}
+
+        def fetch(url, throttle):
+            throttles.setdefault(url.split('/')[2], set()).add(id(throttle))
+            return url.upper()
+
+        self.assertEqual(scheduler.run(fetch, urls), [url.upper() for url in urls])
+        self.assertEqual(len(throttles['a.com']), 1)
+        self.assertNotEqual(throttles['a.com'], throttles['b.com'])
+
+    def test_throttle_defer(self):
+        throttle = HostThrottle(interval=0, max_retry_after=10)
+        self.assertTrue(throttle.defer(1))
+        self.assertFalse(throttle.defer(60))
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from ..models import LinkVerdict
+from ..store import VerdictStore
+
+
+class VerdictStoreTests(TestCase):
+
+    def test_status_codes(self):
+        store = VerdictStore()
+        store.save_status_codes({
+            'http://example.com/': 200,
+            'http://example.com/missing/': 404,
+            'http://example.invalid/': None,
+        })
+        self.assertEqual(LinkVerdict.objects.count(), 3)
+        self.assertEqual(store.get_status_codes(['http://example.com/', 'http://example.com/missing/']), {
+            'http://example.com/': 200,
+            'http://example.com/missing/': 404,
+        })
+
+        # Expired verdicts are ignored
+        LinkVerdict.objects.filter(url='http://example.com/missing/').update(
+            checked_at=now() - timedelta(days=2))
+        self.assertEqual(store.get_status_codes(['http://example.com/missing/']), {})
+
+        # Verdicts are updated
+        store.save_status_codes({'http://example.com/missing/': 200})
+        self.assertEqual(LinkVerdict.objects.count(), 3)
+        self.assertEqual(store.get_status_codes(['http://example.com/missing/']), {'http://example.com/missing/': 200})
+
+        # New and stored verdicts are saved together: one query to find the
+        # stored ones, one to create the others, and one update per status
+        # code (plus a savepoint)
+        with CaptureQueriesContext(connection) as queries:
+            store.save_status_codes({
+                'http://example.com/': 301,
+                'http://example.com/missing/': 200,
+                'http://example.com/new/': 200,
+            })
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual(LinkVerdict.objects.count(), 4)
+        self.assertEqual(store.get_status_codes(['http://example.com/', 'http://example.com/new/']), {
+            'http://example.com/': 301,
+            'http://example.com/new/': 200,
+        })
+
+        # Refreshing ignores every stored verdict
+        self.assertEqual(VerdictStore(refresh=True).get_status_codes(['http://example.com/']), {})
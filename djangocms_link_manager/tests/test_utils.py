@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test.testcases import TestCase
+
+from ..utils import normalize_link, normalize_url
+
+
+class NormalizeUrlTests(TestCase):
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url('HTTP://WWW.Example.com'), 'http://www.example.com/')
+        self.assertEqual(normalize_url('http://www.example.com:80/path#top'), 'http://www.example.com/path')
+        self.assertEqual(normalize_url('https://www.example.com:443/?q=Query'), 'https://www.example.com/?q=Query')
+        self.assertEqual(normalize_url('https://www.example.com:8443/'), 'https://www.example.com:8443/')
+        self.assertEqual(normalize_url('http://User@Example.com/'), 'http://User@example.com/')
+
+        # Relative and scheme-less URLs get the defaults
+        self.assertEqual(normalize_url('/media/file.pdf'), 'http://localhost:8000/media/file.pdf')
+        self.assertEqual(
+            normalize_url('/media/file.pdf', scheme='https', netloc='example.com'),
+            'https://example.com/media/file.pdf'
+        )
+
+        # Other schemes are left alone
+        self.assertEqual(normalize_url('MAILTO:user@host.com'), 'mailto:user@host.com')
+        self.assertEqual(normalize_url('tel:+41444801270'), 'tel:+41444801270')
+
+    def test_normalize_link(self):
+        self.assertEqual(
+            normalize_link('HTTP://WWW.Example.com:80/path#top'),
+            ('http://www.example.com/path', 'www.example.com')
+        )
+        self.assertEqual(
+            normalize_link('https://user@example.com:8443/'),
+            ('https://user@example.com:8443/', 'example.com')
+        )
+
+        # Links without a host
+        self.assertEqual(normalize_link(' /en/page/#top'), ('/en/page/', ''))
+        self.assertEqual(normalize_link('mailto:user@host.com'), ('mailto:user@host.com', ''))
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test.testcases import TestCase
+
+from ..link_manager import LinkManager
+from ..verdicts import UNSUPPORTED_SCHEME
+from ..scheduler import HostScheduler
+from ..verifier import LinkVerifier
+
+
+class FooLinkManager(LinkManager):
+
+    def validate_foo(self, parts, verify_exists=False):
+        return True
+
+
+class LinkVerifierTests(TestCase):
+
+    def test_validations_per_link_manager_class(self):
+        verifier = LinkVerifier()
+        self.assertTrue(FooLinkManager(verifier=verifier).validate_url('foo:bar'))
+        self.assertEqual(LinkManager(verifier=verifier).validate_url('foo:bar').reason, UNSUPPORTED_SCHEME)
+        self.assertEqual(verifier.unique_urls, 1)
+        self.assertEqual(verifier.references, 2)
+
+    def test_collect_and_verify_pending(self):
+        verifier = LinkVerifier(scheduler=HostScheduler(concurrency=2))
+        link_manager = LinkManager(verifier=verifier)
+        url = 'http://localhost/non-existent-obj/'
+
+        with verifier.collect():
+            # Valid URLs are only queued while collecting.
+            self.assertTrue(link_manager.validate_url(url, verify_exists=True))
+            self.assertFalse(link_manager.validate_url('http://2002::/', verify_exists=True))
+        self.assertEqual(list(verifier._pending), [url])
+
+        verifier.verify_pending()
+        self.assertEqual(len(verifier._pending), 0)
+        self.assertIsNone(verifier._status_codes[url])
+        self.assertFalse(link_manager.validate_url(url, verify_exists=True))
@@ -7,11 +7,13 @@ from django.conf.urls import url
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import TemplateView
 
-from .views import AnalyzeView
+from .views import AnalyzeView, JobStatusView, JobView
 
 app_name = "link-manager"
 
 urlpatterns = [
     url(r'^$', TemplateView.as_view(template_name='djangocms_link_manager/start.html'), name="start"),
     url(_(r'^analyze/$'), AnalyzeView.as_view(), name="analyze"),
+    url(r'^jobs/(?P<pk>\d+)/$', JobView.as_view(), name="job"),
+    url(r'^jobs/(?P<pk>\d+)/status/$', JobStatusView.as_view(), name="job-status"),
 ]
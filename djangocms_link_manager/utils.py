@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+
+from email.utils import mktime_tz, parsedate_tz
+
+try:  # pragma: no cover
+    # Python 3.x
+    from urllib.parse import urlparse, urlunparse
+except ImportError:  # pragma: no cover
+    # Python 2.x
+    from urlparse import urlparse, urlunparse
+
+from django.db import connections
+
+
+NETWORK_SCHEMES = ('http', 'https', 'ftp', 'ftps')
+
+DEFAULT_PORTS = {
+    'http': '80',
+    'https': '443',
+    'ftp': '21',
+}
+
+
+def normalize_url(url, scheme='http', netloc='localhost:8000'):
+    """
+    Return a canonical form of `url`, so that URLs pointing to the same
+    resource can be validated once. The scheme and host are lower-cased, the
+    default port and the fragment are dropped, and relative or scheme-less
+    URLs get the provided defaults.
+
+    :param url:
+    :param scheme: Default scheme for scheme-less URLs
+    :param netloc: Default [host:port] for relative URLs
+    :return:
+    """
+    parts = urlparse(url.strip())
+    url_scheme = (parts.scheme or scheme).lower()
+    url_netloc = parts.netloc
+    path = parts.path
+
+    if url_scheme in NETWORK_SCHEMES:
+        userinfo, _, host = (url_netloc or netloc).rpartition('@')
+        host = host.lower()
+        hostname, _, port = host.rpartition(':')
+        if hostname and port == DEFAULT_PORTS.get(url_scheme):
+            host = hostname
+        url_netloc = '@'.join([userinfo, host]) if userinfo else host
+        path = path or '/'
+
+    return urlunparse((url_scheme, url_netloc, path, parts.params, parts.query, ''))
+
+
+def normalize_link(url):
+    """
+    Return the canonical form of the URL of a link (see normalize_url) and
+    its host name. Relative URLs and URLs without a host (mailto:, tel:...)
+    are only stripped of their fragment, and have an empty host.
+    """
+    parts = urlparse(url.strip())
+    if not parts.netloc:
+        return urlunparse(parts[:5] + ('',)), ''
+    url = normalize_url(url)
+    return url, urlparse(url).hostname or ''
+
+
+def normalize_host(host):
+    return host.strip().lower().rstrip('.')
+
+
+def is_success(status_code):
+    """
+    Return True if `status_code` is in the range 200 <= «status» < 400.
+    """
+    return status_code is not None and 200 <= status_code < 400
+
+
+def parse_retry_after(value):
+    """
+    Return the number of seconds to wait according to the value of a
+    Retry-After header (either a number of seconds or an HTTP date), or None
+    if it can't be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0, mktime_tz(date) - time.time())
+
+
+def close_idle_connections():
+    """
+    Close the database connections which are broken, or older than
+    CONN_MAX_AGE (i.e. all of them by default), so that none is held open
+    during the hours a run may take. They are opened again when needed.
+    """
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import attr
+
+from .utils import is_success
+
+
+# Reasons for which a URL is not valid.
+EMPTY = 'empty'
+MALFORMED = 'malformed'
+UNSUPPORTED_SCHEME = 'unsupported-scheme'
+INVALID = 'invalid'
+UNREACHABLE = 'unreachable'
+HTTP_ERROR = 'http-error'
+
+
+@attr.s(slots=True)
+class Verdict(object):
+    """
+    The outcome of validating a URL. It is truthy when the URL is valid, so it
+    can be used wherever a boolean is expected.
+    """
+    valid = attr.ib()
+    reason = attr.ib(default=None)
+    status_code = attr.ib(default=None)
+
+    def __bool__(self):
+        return bool(self.valid)
+
+    __nonzero__ = __bool__  # Python 2.x
+
+    @classmethod
+    def from_status_code(cls, status_code):
+        if is_success(status_code):
+            return cls(True, status_code=status_code)
+        if status_code is None:
+            return cls(False, reason=UNREACHABLE)
+        return cls(False, reason=HTTP_ERROR, status_code=status_code)
+
+
+def as_verdict(value):
+    """
+    Return `value` as a Verdict, `value` being a Verdict or a boolean (as
+    returned by custom scheme validators).
+    """
+    if isinstance(value, Verdict):
+        return value
+    return Verdict(bool(value), reason=None if value else INVALID)
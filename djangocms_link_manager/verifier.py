@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import socket
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import attr
+import requests
+
+from .client import HttpClient, get_default_client
+from .metrics import Metrics
+from .scheduler import HostScheduler
+from .utils import close_idle_connections, is_success, normalize_url, parse_retry_after
+from .verdicts import Verdict
+
+
+# Statuses with which a host may ask us to come back later (Retry-After).
+RETRY_LATER_STATUSES = (429, 503)
+
+
+def request(client, method, url, throttle=None, **kwargs):
+    """
+    Make a request, waiting for the host's throttle first if given. When the
+    host answers with a Retry-After header, retry once after the delay.
+    """
+    retried = False
+    while True:
+        if throttle is not None:
+            throttle.wait()
+        response = client.request(method, url, **kwargs)
+        if throttle is None or retried or response.status_code not in RETRY_LATER_STATUSES:
+            return response
+        delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None or not throttle.defer(delay):
+            return response
+        response.close()
+        retried = True
+
+
+def get_status_code(url, throttle=None, client=None):
+    """
+    Makes a HEAD request (falling back to a GET request) for the given URL and
+    returns the status code of the response, or None if the URL could not be
+    fetched at all.
+
+    :param url:
+    :param throttle: HostThrottle of the URL's host
+    :param client: HttpClient to make the requests with
+    :return:
+    """
+    if client is None:
+        client = get_default_client()
+    try:
+        response = request(client, 'head', url, throttle)
+        if 400 <= response.status_code <= 500:  # Some sites do not handle HEAD requests correctly
+            raise requests.HTTPError
+        return response.status_code  # pragma: no cover
+    except requests.HTTPError:
+        try:
+            # Only the status matters, so don't download the body.
+            response = request(client, 'get', url, throttle, stream=True, headers={
+                # Some site check for a common User Agent
+                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:83.0) Gecko/20100101 Firefox/83.0"
+            })
+            response.close()
+            return response.status_code  # pragma: no cover
+        except (requests.RequestException,
+                UnicodeEncodeError,
+                socket.error):
+            return None
+    except (requests.RequestException,
+            UnicodeEncodeError,
+            socket.error):
+        return None
+
+
+def url_exists(url):
+    """
+    Returns True if the URL responds with a status in the range
+    200 <= «status» < 400.
+
+    :param url:
+    :return:
+    """
+    return is_success(get_status_code(url))
+
+
+@attr.s(slots=True)
+class LinkVerifier(object):
+    """
+    Verifies that URLs exist, remembering the verdict of each normalized URL
+    for the duration of a run.
+
+    While collecting (see `collect()`), URLs are not fetched but queued, and
+    are provisionally reported as existing. The queued URLs are then fetched
+    by `verify_pending()` through the scheduler, which spreads them over the
+    hosts concurrently, after which a second pass over the same links gets
+    the real verdicts from memory.
+
+    When a `store` is given, verdicts are also looked up in and saved to it,
+    so that they survive across runs. When a `resolver` is given, the URLs it
+    considers local are checked by it instead of being fetched (nor stored).
+    The time spent and the hits of the store are recorded in `metrics`.
+    """
+    scheduler = attr.ib(default=attr.Factory(HostScheduler))
+    client = attr.ib(default=attr.Factory(HttpClient))
+    store = attr.ib(default=None)
+    resolver = attr.ib(default=None)
+    metrics = attr.ib(default=attr.Factory(Metrics))
+    collecting = attr.ib(default=False, init=False)
+    _pending = attr.ib(default=attr.Factory(OrderedDict), init=False)
+    references = attr.ib(default=0, init=False)
+    _status_codes = attr.ib(default=attr.Factory(dict), init=False)
+    _validations = attr.ib(default=attr.Factory(dict), init=False)
+    _urls = attr.ib(default=attr.Factory(set), init=False)
+
+    @property
+    def unique_urls(self):
+        return len(self._urls)
+
+    @contextmanager
+    def collect(self):
+        self.collecting = True
+        try:
+            yield self
+        finally:
+            self.collecting = False
+
+    def validate(self, key, verify_exists, validate, validator=None):
+        """
+        Return the verdict for the normalized URL `key`. `validate` is only
+        called the first time the URL is seen by the same `validator` (e.g.
+        a link manager class) during the run; verdicts given while
+        collecting are provisional and are not remembered.
+
+        :param key: Normalized URL
+        :param verify_exists:
+        :param validate: Callable returning the verdict
+        :param validator: What validates the URL, for verdicts to be shared
+        :return:
+        """
+        if not self.collecting:
+            self.references += 1
+        try:
+            return self._validations[validator, key, verify_exists]
+        except KeyError:
+            pass
+
+        verdict = validate()
+        if not self.collecting:
+            self._validations[validator, key, verify_exists] = verdict
+            self._urls.add(key)
+        return verdict
+
+    def verify(self, url):
+        """
+        Return a Verdict telling whether the URL exists.
+
+        :param url:
+        :return:
+        """
+        key = normalize_url(url)
+        try:
+            return Verdict.from_status_code(self._status_codes[key])
+        except KeyError:
+            pass
+
+        if self.collecting:
+            self._pending.setdefault(key, url)
+            return Verdict(True)
+
+        self._fetch({key: url})
+        return Verdict.from_status_code(self._status_codes[key])
+
+    def get_status_code(self, url, throttle=None):
+        return get_status_code(url, throttle=throttle, client=self.client)
+
+    def verify_pending(self):
+        """
+        Fetch every URL queued while collecting.
+        """
+        pending = self._pending
+        self._pending = OrderedDict()
+        self._fetch(pending)
+
+    def _fetch(self, urls):
+        """
+        Get the status codes of `urls`, a mapping of normalized URLs to URLs,
+        locally, from the store or else from the network.
+        """
+        with self.metrics.phase('network_verification'):
+            self._fetch_status_codes(urls)
+
+    def _fetch_status_codes(self, urls):
+        if self.resolver is not None and urls:
+            local = OrderedDict((key, url) for key, url in urls.items() if self.resolver.is_local(key))
+            if local:
+                self._status_codes.update(zip(local, self.resolver.get_status_codes(list(local))))
+                self.metrics.incr('locally_resolved', len(local))
+                urls = OrderedDict((key, url) for key, url in urls.items() if key not in local)
+        if self.store is not None and urls:
+            stored = self.store.get_status_codes(list(urls))
+            self._status_codes.update(stored)
+            self.metrics.incr('store_hits', len(stored))
+            self.metrics.incr('store_misses', len(urls) - len(stored))
+            urls = OrderedDict((key, url) for key, url in urls.items() if key not in stored)
+        if not urls:
+            return
+
+        # No connection is held open while the URLs are fetched.
+        close_idle_connections()
+        status_codes = self.scheduler.run(self.get_status_code, list(urls.values()))
+        fetched = dict(zip(urls, status_codes))
+        self._status_codes.update(fetched)
+
+        if self.store is not None:
+            self.store.save_status_codes(fetched)
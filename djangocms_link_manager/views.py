@@ -1,36 +1,74 @@
 # -*- coding: utf-8 -*-
-try:
-    from StringIO import StringIO  # for Python 2
-except ImportError:
-    from io import StringIO  # for Python 3
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.views.generic import DetailView, View
 
+from .models import AnalysisJob
 
-from django.core.management import call_command
-from django.views.generic import TemplateView
 
-
-class AnalyzeView(TemplateView):
-    template_name = 'djangocms_link_manager/end.html'
+class AnalyzeView(View):
+    """
+    Queue an analysis (or join the pending one for the same page), and
+    redirect to its progress page.
+    """
 
     def get(self, request, *args, **kwargs):
         verify_exists = 'verify_exists' in request.GET
-        page_id = request.GET.get('page_id', None)
-        host = request.get_host()
+        page_id = request.GET.get('page_id', None) or None
+        if page_id is not None:
+            try:
+                page_id = int(page_id)
+            except ValueError:
+                return HttpResponseBadRequest('Invalid page_id')
         is_mail_managers = page_id is None
 
-        out = StringIO()
-        call_command(
-            'check_links',
+        job = AnalysisJob.objects.enqueue(
+            page_id=page_id,
             verify_exists=verify_exists,
-            only_page_with_id=page_id,
+            host=request.get_host(),
             mail_managers=is_mail_managers,
-            host=host,
-            stdout=out
         )
+        return redirect('link-manager:job', pk=job.pk)
+
+
+class JobView(DetailView):
+    """
+    Show the progress of an analysis, and its output once finished.
+    """
+    model = AnalysisJob
+    context_object_name = 'job'
+
+    def get_template_names(self):
+        if self.object.is_finished:
+            return ['djangocms_link_manager/end.html']
+        return ['djangocms_link_manager/job.html']
 
-        context = {
-            "is_mail_managers": is_mail_managers,
-            "page_id": page_id,
-            "output": out.getvalue()
-        }
-        return self.render_to_response(context)
+    def get_context_data(self, **kwargs):
+        context = super(JobView, self).get_context_data(**kwargs)
+        context.update({
+            "is_mail_managers": self.object.mail_managers,
+            "page_id": self.object.page_id,
+            "output": self.object.output,
+        })
+        return context
+
+
+class JobStatusView(View):
+    """
+    Return the status of an analysis and its output written since `offset`
+    (a number of characters), so that clients can follow it as it goes.
+    """
+
+    def get(self, request, *args, **kwargs):
+        job = get_object_or_404(AnalysisJob, pk=kwargs['pk'])
+        try:
+            offset = max(0, int(request.GET.get('offset', 0)))
+        except ValueError:
+            offset = 0
+        return JsonResponse({
+            'id': job.pk,
+            'status': job.status,
+            'finished': job.is_finished,
+            'output': job.output[offset:],
+            'offset': len(job.output),
+        })
@@ -9,7 +9,7 @@ INSTALL_REQUIRES = [
     'django>=1.8.0',
     'django-cms>=3.0',
     'phonenumberslite>=7.4,<8.0',
-    'attrs',
+    'attrs>=17.1',
     'requests',
 ]
 
@@ -39,7 +39,7 @@ setup(
     author='Divio',
     author_email='info@divio.com',
     url='https://github.com/divio/djangocms-link-manager/',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     install_requires=INSTALL_REQUIRES,
     license='LICENSE.txt',
     platforms=['OS Independent'],